@@ -4,15 +4,31 @@ const mongoose = require('mongoose');
 const cors = require('cors');
 const path = require('path');
 
+// Prije modela: deadline plugin (maxTimeMS) mora biti na svim šemama
+const deadline = require('./services/deadline');
+
 // Uvoz ruta
 const authRoutes = require('./routes/auth');
 const adminRoutes = require('./routes/admin');
 const publicRoutes = require('./routes/public');
 const paymentRoutes = require('./routes/payments');
+const uploadRoutes = require('./routes/uploads');
+
+// Servisi
+const entitlements = require('./services/entitlements');
+const search = require('./services/search');
+const loadMonitor = require('./services/loadMonitor');
+const prerender = require('./services/prerender');
+const inventory = require('./services/inventory');
 
 const app = express();
 const PORT = process.env.PORT || 3000;
 
+// Iza nginx-a: req.ip uzima X-Forwarded-For
+app.set('trust proxy', 'loopback');
+
+app.use('/api', loadMonitor.trackInFlight);
+
 /* ==========================================
    1. CORS POSTAVKE
 ========================================== */
@@ -30,8 +46,14 @@ app.post('/api/payments/webhook', express.raw({ type: 'application/json' }));
 /* ==========================================
    3. STANDARDNI MIDDLEWARE
 ========================================== */
-app.use(express.json({ limit: '10mb' }));
-app.use(express.urlencoded({ extended: true, limit: '10mb' }));
+// Slike idu kroz /api/uploads (multipart stream), JSON ostaje mali
+app.use(express.json({ limit: '1mb' }));
+app.use(express.urlencoded({ extended: true, limit: '1mb' }));
+
+// Svaki API zahtjev dobija vremenski budžet (REQUEST_BUDGET_MS); kad istekne vraća se 504
+app.use('/api', deadline.middleware);
+// Mjeri koliko svaki zahtjev drži event loop, samo ako je BLOCKED_LOOP_THRESHOLD_MS > 0
+app.use('/api', loadMonitor.watchBlocking);
 
 /* ==========================================
    4. API RUTE
@@ -39,13 +61,17 @@ app.use(express.urlencoded({ extended: true, limit: '10mb' }));
 app.use('/api/auth', authRoutes);
 app.use('/api/admin', adminRoutes);
 app.use('/api/payments', paymentRoutes);
+app.use('/api/uploads', uploadRoutes);
 app.use('/api', publicRoutes);
 
 /* ==========================================
    5. SERVIRANJE FRONTENDA (React Build)
 ========================================== */
+app.use(uploadRoutes.PUBLIC_PATH, uploadRoutes.serveUploads);
+
 // Služi statične fajlove iz 'public' foldera (gde ide build tvojeg React-a)
-app.use(express.static(path.join(__dirname, 'public')));
+// index: false -> i "/" ide kroz prerender ispod
+app.use(express.static(path.join(__dirname, 'public'), { index: false }));
 
 // Fallback za React Router - omogućava refresh stranice bez 404 greške
 app.get('*', (req, res) => {
@@ -53,8 +79,8 @@ app.get('*', (req, res) => {
   if (req.originalUrl.startsWith('/api')) {
     return res.status(404).json({ message: 'API endpoint nije pronađen.' });
   }
-  // Za sve ostalo, pošalji index.html iz frontenda
-  res.sendFile(path.join(__dirname, 'public', 'index.html'));
+  // Za sve ostalo, pošalji index.html iz frontenda (prerenderovan sa podacima)
+  prerender.send(req, res);
 });
 
 /* ==========================================
@@ -75,6 +101,15 @@ const startApp = async () => {
     console.log('-----------------------------------------');
     console.log('✅ DATABASE: MongoDB povezan uspešno.');
 
+    // Indeks pristupa kursevima (korisnik -> kursevi)
+    await entitlements.load();
+
+    // Indeks za pretragu
+    await search.load();
+
+    // Čišćenje isteklih rezervacija proizvoda
+    inventory.startSweeper();
+
     // Pokretanje servera
     app.listen(PORT, '0.0.0.0', () => {
       console.log(`🚀 SERVER: Continental Academy je ONLINE.`);
@@ -0,0 +1,122 @@
+const loadMonitor = require('../services/loadMonitor');
+
+// Token-bucket rate limiting per IP and per account, plus load shedding.
+// Buckets live in a store with async take()/refund() so a shared store (e.g. Redis)
+// can replace the in-memory one when running more than one worker.
+
+const MAX_IN_FLIGHT = parseInt(process.env.ADMISSION_MAX_IN_FLIGHT || '200', 10);
+const MAX_LAG_MS = parseInt(process.env.ADMISSION_MAX_LAG_MS || '200', 10);
+
+// burst = bucket size, perMinute = refill rate, failuresOnly = successful requests get their token back
+const routes = {
+  login: {
+    ip: { burst: 50, perMinute: 60 },
+    // Guards against password guessing; a user logging in repeatedly is not limited
+    account: { burst: 10, perMinute: 2, failuresOnly: true }
+  },
+  register: {
+    ip: { burst: 10, perMinute: 10 }
+  },
+  analytics: {
+    ip: { burst: 120, perMinute: 120 }
+  }
+};
+
+class MemoryStore {
+  constructor() {
+    this.buckets = new Map();
+    setInterval(() => this.prune(), 60 * 1000).unref();
+  }
+
+  // Returns { allowed, retryAfter } where retryAfter is in seconds
+  async take(key, { burst, perMinute }) {
+    const now = Date.now();
+    const ratePerMs = perMinute / 60000;
+    let bucket = this.buckets.get(key);
+    if (!bucket) {
+      bucket = { tokens: burst, updated: now, burst, ratePerMs };
+      this.buckets.set(key, bucket);
+    }
+
+    bucket.tokens = Math.min(burst, bucket.tokens + (now - bucket.updated) * ratePerMs);
+    bucket.updated = now;
+
+    if (bucket.tokens >= 1) {
+      bucket.tokens -= 1;
+      return { allowed: true, retryAfter: 0 };
+    }
+    return { allowed: false, retryAfter: Math.ceil((1 - bucket.tokens) / ratePerMs / 1000) };
+  }
+
+  // Returns a token taken by take(), e.g. when the request turned out not to count
+  async refund(key) {
+    const bucket = this.buckets.get(key);
+    if (bucket) bucket.tokens = Math.min(bucket.burst, bucket.tokens + 1);
+  }
+
+  // Drop buckets that have refilled completely, they carry no state
+  prune() {
+    const now = Date.now();
+    this.buckets.forEach((bucket, key) => {
+      if (bucket.tokens + (now - bucket.updated) * bucket.ratePerMs >= bucket.burst) {
+        this.buckets.delete(key);
+      }
+    });
+  }
+}
+
+let store = new MemoryStore();
+
+const setStore = (newStore) => {
+  store = newStore;
+};
+
+const tooMany = (res, retryAfter, detail) => {
+  res.set('Retry-After', String(Math.max(retryAfter, 1)));
+  return res.status(429).json({ detail });
+};
+
+// Usage: router.post('/login', rateLimit('login'), handler)
+const rateLimit = (routeName) => {
+  const config = routes[routeName];
+  if (!config) throw new Error(`Unknown rate limit route: ${routeName}`);
+
+  return async (req, res, next) => {
+    try {
+      if (config.shed !== false &&
+          (loadMonitor.getInFlight() > MAX_IN_FLIGHT || loadMonitor.getLagMs() > MAX_LAG_MS)) {
+        return tooMany(res, 1, 'Server je trenutno preopterećen, pokušajte ponovo');
+      }
+
+      if (config.ip) {
+        const result = await store.take(`${routeName}:ip:${req.ip}`, config.ip);
+        if (!result.allowed) {
+          return tooMany(res, result.retryAfter, 'Previše zahtjeva, pokušajte ponovo kasnije');
+        }
+      }
+
+      const email = req.body && typeof req.body.email === 'string' ? req.body.email.toLowerCase().trim() : '';
+      if (config.account && email) {
+        const key = `${routeName}:account:${email}`;
+        const result = await store.take(key, config.account);
+        if (!result.allowed) {
+          return tooMany(res, result.retryAfter, 'Previše pokušaja za ovaj nalog, pokušajte ponovo kasnije');
+        }
+        if (config.account.failuresOnly) {
+          res.on('finish', () => {
+            if (res.statusCode >= 400) return;
+            store.refund(key).catch(error => console.error('Rate limit error:', error.message));
+          });
+        }
+      }
+
+      next();
+    } catch (error) {
+      // Limiter problems must not take the route down
+      console.error('Rate limit error:', error.message);
+      next();
+    }
+  };
+};
+
+module.exports = { rateLimit, setStore, MemoryStore, routes };
@@ -11,6 +11,10 @@ const shopProductSchema = new mongoose.Schema({
   specs: { type: mongoose.Schema.Types.Mixed },
   is_available: { type: Boolean, default: true },
   stripe_price_id: { type: String },
+  // Checkout hold (see services/inventory.js)
+  reserved_until: { type: Date },
+  reserved_by: { type: String },
+  reservation_session: { type: String },
   created_at: { type: Date, default: Date.now }
 });
 
@@ -19,6 +23,8 @@ shopProductSchema.methods.toJSON = function() {
   obj.id = obj._id.toString();
   delete obj._id;
   delete obj.__v;
+  delete obj.reserved_by;
+  delete obj.reservation_session;
   return obj;
 };
 
@@ -9,6 +9,13 @@ const Result = require('../models/Result');
 const Settings = require('../models/Settings');
 const AnalyticsEvent = require('../models/AnalyticsEvent');
 const { adminAuth } = require('../middleware/auth');
+const entitlements = require('../services/entitlements');
+const playback = require('../services/playback');
+const search = require('../services/search');
+const prerender = require('../services/prerender');
+const { findSerialized } = require('../services/serializers');
+const loadMonitor = require('../services/loadMonitor');
+const profiler = require('../services/profiler');
 
 const router = express.Router();
 
@@ -17,7 +24,7 @@ const router = express.Router();
 // Get all users
 router.get('/users', adminAuth, async (req, res) => {
   try {
-    const users = await User.find().sort({ created_at: -1 });
+    const users = await findSerialized(req, User.find().sort({ created_at: -1 }));
     res.json(users);
   } catch (error) {
     console.error('Get users error:', error);
@@ -85,6 +92,7 @@ router.put('/users/:userId/courses', adminAuth, async (req, res) => {
       return res.status(404).json({ detail: 'User not found' });
     }
     
+    entitlements.setUser(user);
     res.json(user.courses);
   } catch (error) {
     console.error('Update user courses error:', error);
@@ -106,6 +114,7 @@ router.post('/users/:userId/courses/add', adminAuth, async (req, res) => {
     if (!user.courses.includes(course_id)) {
       user.courses.push(course_id);
       await user.save();
+      entitlements.setUser(user);
     }
     
     res.json({ message: 'Course added', courses: user.courses });
@@ -128,6 +137,7 @@ router.post('/users/:userId/courses/remove', adminAuth, async (req, res) => {
     
     user.courses = user.courses.filter(c => c !== course_id);
     await user.save();
+    entitlements.setUser(user);
     
     res.json({ message: 'Course removed', courses: user.courses });
   } catch (error) {
@@ -152,6 +162,7 @@ router.put('/users/:userId/subscriptions', adminAuth, async (req, res) => {
       return res.status(404).json({ detail: 'User not found' });
     }
     
+    entitlements.setUser(user);
     res.json(user.subscriptions);
   } catch (error) {
     console.error('Update subscriptions error:', error);
@@ -164,7 +175,7 @@ router.put('/users/:userId/subscriptions', adminAuth, async (req, res) => {
 // Get all programs (admin)
 router.get('/programs', adminAuth, async (req, res) => {
   try {
-    const programs = await Program.find().sort({ created_at: -1 });
+    const programs = await findSerialized(req, Program.find().sort({ created_at: -1 }));
     res.json(programs);
   } catch (error) {
     console.error('Get programs error:', error);
@@ -177,6 +188,8 @@ router.post('/programs', adminAuth, async (req, res) => {
   try {
     const program = new Program(req.body);
     await program.save();
+    search.upsert('program', program);
+    prerender.invalidate();
     res.status(201).json(program);
   } catch (error) {
     console.error('Create program error:', error);
@@ -193,6 +206,8 @@ router.put('/programs/:id', adminAuth, async (req, res) => {
       { new: true }
     );
     if (!program) return res.status(404).json({ detail: 'Program not found' });
+    search.upsert('program', program);
+    prerender.invalidate();
     res.json(program);
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -204,6 +219,8 @@ router.delete('/programs/:id', adminAuth, async (req, res) => {
   try {
     const program = await Program.findByIdAndDelete(req.params.id);
     if (!program) return res.status(404).json({ detail: 'Program not found' });
+    search.remove('program', req.params.id);
+    prerender.invalidate();
     res.json({ message: 'Program deleted' });
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -215,16 +232,15 @@ router.delete('/programs/:id', adminAuth, async (req, res) => {
 // Get all courses (admin)
 router.get('/courses', adminAuth, async (req, res) => {
   try {
-    const courses = await Course.find().sort({ order: 1, created_at: -1 });
-    const programs = await Program.find();
+    const courses = await findSerialized(req, Course.find().sort({ order: 1, created_at: -1 }));
+    const programs = await Program.find({}, { name: 1 }).lean();
     const programMap = {};
     programs.forEach(p => { programMap[p._id.toString()] = p.name; });
     
-    const coursesWithInfo = await Promise.all(courses.map(async (course) => {
-      const lessonCount = await Lesson.countDocuments({ course_id: course._id.toString() });
-      const courseJson = course.toJSON();
+    const coursesWithInfo = await Promise.all(courses.map(async (courseJson) => {
+      const lessonCount = await Lesson.countDocuments({ course_id: courseJson.id });
       courseJson.lesson_count = lessonCount;
-      courseJson.program_name = programMap[course.program_id] || 'No program';
+      courseJson.program_name = programMap[courseJson.program_id] || 'No program';
       return courseJson;
     }));
     
@@ -239,6 +255,8 @@ router.post('/courses', adminAuth, async (req, res) => {
   try {
     const course = new Course(req.body);
     await course.save();
+    entitlements.setCourse(course);
+    search.upsert('course', course);
     res.status(201).json(course);
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -250,6 +268,8 @@ router.put('/courses/:id', adminAuth, async (req, res) => {
   try {
     const course = await Course.findByIdAndUpdate(req.params.id, req.body, { new: true });
     if (!course) return res.status(404).json({ detail: 'Course not found' });
+    entitlements.setCourse(course);
+    search.upsert('course', course);
     res.json(course);
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -262,6 +282,9 @@ router.delete('/courses/:id', adminAuth, async (req, res) => {
     const course = await Course.findByIdAndDelete(req.params.id);
     if (!course) return res.status(404).json({ detail: 'Course not found' });
     await Lesson.deleteMany({ course_id: req.params.id });
+    entitlements.removeCourse(req.params.id);
+    search.remove('course', req.params.id);
+    search.removeLessonsOfCourse(req.params.id);
     res.json({ message: 'Course deleted' });
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -274,6 +297,7 @@ router.post('/lessons', adminAuth, async (req, res) => {
   try {
     const lesson = new Lesson(req.body);
     await lesson.save();
+    search.upsert('lesson', lesson);
     res.status(201).json(lesson);
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -284,6 +308,8 @@ router.put('/lessons/:id', adminAuth, async (req, res) => {
   try {
     const lesson = await Lesson.findByIdAndUpdate(req.params.id, req.body, { new: true });
     if (!lesson) return res.status(404).json({ detail: 'Lesson not found' });
+    playback.invalidateLesson(lesson._id.toString());
+    search.upsert('lesson', lesson);
     res.json(lesson);
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -294,6 +320,8 @@ router.delete('/lessons/:id', adminAuth, async (req, res) => {
   try {
     const lesson = await Lesson.findByIdAndDelete(req.params.id);
     if (!lesson) return res.status(404).json({ detail: 'Lesson not found' });
+    playback.invalidateLesson(lesson._id.toString());
+    search.remove('lesson', req.params.id);
     res.json({ message: 'Lesson deleted' });
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -316,7 +344,7 @@ router.put('/lessons/reorder', adminAuth, async (req, res) => {
 
 router.get('/shop/products', adminAuth, async (req, res) => {
   try {
-    const products = await ShopProduct.find().sort({ created_at: -1 });
+    const products = await findSerialized(req, ShopProduct.find().sort({ created_at: -1 }));
     res.json(products);
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -327,6 +355,7 @@ router.post('/shop/products', adminAuth, async (req, res) => {
   try {
     const product = new ShopProduct(req.body);
     await product.save();
+    search.upsert('product', product);
     res.status(201).json(product);
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -337,6 +366,7 @@ router.put('/shop/products/:id', adminAuth, async (req, res) => {
   try {
     const product = await ShopProduct.findByIdAndUpdate(req.params.id, req.body, { new: true });
     if (!product) return res.status(404).json({ detail: 'Product not found' });
+    search.upsert('product', product);
     res.json(product);
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -347,6 +377,7 @@ router.delete('/shop/products/:id', adminAuth, async (req, res) => {
   try {
     const product = await ShopProduct.findByIdAndDelete(req.params.id);
     if (!product) return res.status(404).json({ detail: 'Product not found' });
+    search.remove('product', req.params.id);
     res.json({ message: 'Product deleted' });
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -359,6 +390,7 @@ router.post('/faqs', adminAuth, async (req, res) => {
   try {
     const faq = new FAQ(req.body);
     await faq.save();
+    prerender.invalidate();
     res.status(201).json(faq);
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -369,6 +401,7 @@ router.put('/faqs/:id', adminAuth, async (req, res) => {
   try {
     const faq = await FAQ.findByIdAndUpdate(req.params.id, req.body, { new: true });
     if (!faq) return res.status(404).json({ detail: 'FAQ not found' });
+    prerender.invalidate();
     res.json(faq);
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -379,6 +412,7 @@ router.delete('/faqs/:id', adminAuth, async (req, res) => {
   try {
     const faq = await FAQ.findByIdAndDelete(req.params.id);
     if (!faq) return res.status(404).json({ detail: 'FAQ not found' });
+    prerender.invalidate();
     res.json({ message: 'FAQ deleted' });
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -391,6 +425,7 @@ router.post('/results', adminAuth, async (req, res) => {
   try {
     const result = new Result(req.body);
     await result.save();
+    prerender.invalidate();
     res.status(201).json(result);
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -401,6 +436,7 @@ router.delete('/results/:id', adminAuth, async (req, res) => {
   try {
     const result = await Result.findByIdAndDelete(req.params.id);
     if (!result) return res.status(404).json({ detail: 'Result not found' });
+    prerender.invalidate();
     res.json({ message: 'Result deleted' });
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -418,6 +454,7 @@ router.put('/settings', adminAuth, async (req, res) => {
       Object.assign(settings, req.body);
     }
     await settings.save();
+    prerender.invalidate();
     res.json(settings);
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -430,7 +467,7 @@ router.get('/analytics', adminAuth, async (req, res) => {
   try {
     const totalUsers = await User.countDocuments();
     const totalSubscriptions = await User.countDocuments({ 'subscriptions.0': { $exists: true } });
-    const recentEvents = await AnalyticsEvent.find().sort({ timestamp: -1 }).limit(20);
+    const recentEvents = await findSerialized(req, AnalyticsEvent.find().sort({ timestamp: -1 }).limit(20));
     res.json({
       total_users: totalUsers,
       total_subscriptions: totalSubscriptions,
@@ -441,6 +478,69 @@ router.get('/analytics', adminAuth, async (req, res) => {
   }
 });
 
+// ============= PROFILING =============
+
+// Event-loop delay percentiles and the latest requests that held the loop too long
+router.get('/profiling/loop', adminAuth, async (req, res) => {
+  res.json({
+    in_flight: loadMonitor.getInFlight(),
+    lag_ms: loadMonitor.getLagMs(),
+    loop_delay: loadMonitor.getLoopDelay(),
+    blocked_threshold_ms: loadMonitor.BLOCK_THRESHOLD_MS,
+    blocked_requests: loadMonitor.getRecentBlocks()
+  });
+});
+
+// Start a capture on the live process: { type: 'cpu' | 'heap' | 'snapshot', seconds }
+router.post('/profiling/profiles', adminAuth, async (req, res) => {
+  try {
+    const { type = 'cpu' } = req.body || {};
+    const seconds = parseInt((req.body && req.body.seconds) || '10', 10);
+
+    if (!profiler.TYPES[type]) {
+      return res.status(400).json({ detail: `Invalid type, expected one of: ${Object.keys(profiler.TYPES).join(', ')}` });
+    }
+    if (!Number.isFinite(seconds) || seconds < 1 || seconds > profiler.MAX_SECONDS) {
+      return res.status(400).json({ detail: `seconds must be between 1 and ${profiler.MAX_SECONDS}` });
+    }
+
+    const profile = profiler.start(type, seconds);
+    if (!profile) {
+      return res.status(409).json({ detail: 'A profile is already being captured' });
+    }
+    res.status(202).json(profile);
+  } catch (error) {
+    res.status(500).json({ detail: 'Server error' });
+  }
+});
+
+router.get('/profiling/profiles', adminAuth, async (req, res) => {
+  res.json(profiler.list());
+});
+
+router.get('/profiling/profiles/:id', adminAuth, async (req, res) => {
+  const profile = profiler.get(req.params.id);
+  if (!profile) {
+    return res.status(404).json({ detail: 'Profile not found' });
+  }
+  res.json(profile);
+});
+
+router.get('/profiling/profiles/:id/download', adminAuth, async (req, res) => {
+  const profile = profiler.get(req.params.id);
+  if (!profile) {
+    return res.status(404).json({ detail: 'Profile not found' });
+  }
+  if (profile.status !== 'done') {
+    return res.status(409).json({ detail: `Profile is ${profile.status}` });
+  }
+  res.download(profiler.fileFor(profile.id), profile.filename, (error) => {
+    if (error && !res.headersSent) {
+      res.status(500).json({ detail: 'Server error' });
+    }
+  });
+});
+
 // ============= SEED DATA =============
 
 router.post('/seed', adminAuth, async (req, res) => {
@@ -2,11 +2,12 @@ const express = require('express');
 const jwt = require('jsonwebtoken');
 const User = require('../models/User');
 const { auth } = require('../middleware/auth');
+const { rateLimit } = require('../middleware/rateLimit');
 
 const router = express.Router();
 
 // Register
-router.post('/register', async (req, res) => {
+router.post('/register', rateLimit('register'), async (req, res) => {
   try {
     const { name, email, password } = req.body;
     
@@ -53,7 +54,7 @@ router.post('/register', async (req, res) => {
 });
 
 // Login
-router.post('/login', async (req, res) => {
+router.post('/login', rateLimit('login'), async (req, res) => {
   try {
     const { email, password } = req.body;
     
@@ -1,18 +1,87 @@
 const express = require('express');
+const mongoose = require('mongoose');
 const Stripe = require('stripe');
 const User = require('../models/User');
 const Program = require('../models/Program');
 const ShopProduct = require('../models/ShopProduct');
 const { auth } = require('../middleware/auth');
+const entitlements = require('../services/entitlements');
+const search = require('../services/search');
+const inventory = require('../services/inventory');
+const deadline = require('../services/deadline');
+const CircuitBreaker = require('../services/circuitBreaker');
 
 const router = express.Router();
 
+const STRIPE_TIMEOUT_MS = parseInt(process.env.STRIPE_TIMEOUT_MS || '8000', 10);
+
+const isTimeout = (error) => error.type === 'StripeConnectionError' && /timeout/i.test(error.message);
+
+// Timeouts, connection errors and 5xx count against Stripe; card/validation errors (4xx) don't.
+// A timeout shortened by the request's leftover budget says nothing about Stripe (slow Mongo
+// earlier in the request would otherwise open the circuit), so it is not counted either way.
+const stripeBreaker = new CircuitBreaker('Stripe', {
+  failureThreshold: parseInt(process.env.STRIPE_BREAKER_THRESHOLD || '5', 10),
+  resetTimeoutMs: parseInt(process.env.STRIPE_BREAKER_RESET_MS || '30000', 10),
+  isFailure: (error) => {
+    if (error.budgetLimited) return null;
+    return !error.statusCode || error.statusCode >= 500;
+  }
+});
+
 // Initialize Stripe
+// STRIPE_API_HOST/PORT/PROTOCOL point the client at a local stand-in (tests)
 const getStripe = () => {
   if (!process.env.STRIPE_API_KEY) {
     throw new Error('Stripe API key not configured');
   }
-  return new Stripe(process.env.STRIPE_API_KEY);
+  // Retries would outlive the request budget; callStripe sets the per-call timeout
+  const config = { timeout: STRIPE_TIMEOUT_MS, maxNetworkRetries: 0 };
+  if (process.env.STRIPE_API_HOST) {
+    config.host = process.env.STRIPE_API_HOST;
+    config.port = process.env.STRIPE_API_PORT;
+    config.protocol = process.env.STRIPE_API_PROTOCOL || 'https';
+  }
+  return new Stripe(process.env.STRIPE_API_KEY, config);
+};
+
+// Every Stripe call goes through the breaker, with a timeout taken from the request budget.
+// Usage: callStripe(options => stripe.checkout.sessions.retrieve(id, options))
+const callStripe = async (call) => {
+  const options = { timeout: deadline.timeoutFor(STRIPE_TIMEOUT_MS) };
+  const budgetLimited = options.timeout < STRIPE_TIMEOUT_MS;
+  try {
+    return await stripeBreaker.exec(() => call(options).catch((error) => {
+      if (budgetLimited && isTimeout(error)) error.budgetLimited = true;
+      throw error;
+    }));
+  } catch (error) {
+    if (error.type !== 'StripeConnectionError') throw error;
+    throw isTimeout(error)
+      ? new deadline.DeadlineExceededError('Payment service timed out')
+      : new deadline.ServiceUnavailableError('Payment service unavailable');
+  }
+};
+
+// Expire the user's previous checkout session before a new one is created. Stripe refuses to
+// expire a session that is no longer open, which is fine if it already expired; anything else
+// (still open, paid, Stripe unreachable) stops the checkout so two payable sessions never exist.
+const expireSession = async (stripe, sessionId) => {
+  try {
+    await callStripe(options => stripe.checkout.sessions.expire(sessionId, options));
+  } catch (error) {
+    const session = error.statusCode && error.statusCode < 500
+      ? await callStripe(options => stripe.checkout.sessions.retrieve(sessionId, options)).catch(() => null)
+      : null;
+    if (session?.status === 'expired') return;
+    throw new deadline.ServiceUnavailableError('Prethodna sesija plaćanja nije zatvorena, pokušajte ponovo');
+  }
+};
+
+// Mark a paid product as sold and keep the search index in sync
+const fulfilProduct = async (productId) => {
+  const product = await inventory.markSold(productId);
+  if (product) search.upsert('product', product);
 };
 
 // Create subscription checkout
@@ -28,7 +97,7 @@ router.post('/checkout/subscription', auth, async (req, res) => {
     const stripe = getStripe();
     
     // Create checkout session
-    const session = await stripe.checkout.sessions.create({
+    const session = await callStripe(options => stripe.checkout.sessions.create({
       payment_method_types: ['card'],
       mode: 'subscription',
       line_items: [
@@ -54,12 +123,12 @@ router.post('/checkout/subscription', auth, async (req, res) => {
       },
       success_url: `${origin_url}/dashboard?session_id={CHECKOUT_SESSION_ID}`,
       cancel_url: `${origin_url}/#programs`
-    });
+    }, options));
     
     res.json({ checkout_url: session.url, session_id: session.id });
   } catch (error) {
     console.error('Subscription checkout error:', error);
-    res.status(500).json({ detail: error.message || 'Payment error' });
+    res.status(error.status || 500).json({ detail: error.message || 'Payment error' });
   }
 });
 
@@ -67,44 +136,77 @@ router.post('/checkout/subscription', auth, async (req, res) => {
 router.post('/checkout/product', auth, async (req, res) => {
   try {
     const { product_id, origin_url } = req.query;
+    const userId = req.user._id.toString();
     
-    const product = await ShopProduct.findById(product_id);
-    if (!product) {
+    if (!mongoose.isValidObjectId(product_id)) {
       return res.status(404).json({ detail: 'Product not found' });
     }
     
-    const stripe = getStripe();
+    // Atomically hold the product for this user before talking to Stripe
+    const reservation = await inventory.reserve(product_id, userId);
+    if (!reservation) {
+      const exists = await ShopProduct.exists({ _id: product_id });
+      if (!exists) {
+        return res.status(404).json({ detail: 'Product not found' });
+      }
+      return res.status(409).json({ detail: 'Proizvod je već prodat ili rezervisan' });
+    }
+    const { product, previousSession } = reservation;
+    let previousOpen = Boolean(previousSession);
     
-    // Create checkout session
-    const session = await stripe.checkout.sessions.create({
-      payment_method_types: ['card'],
-      mode: 'payment',
-      line_items: [
-        {
-          price_data: {
-            currency: (product.currency || 'eur').toLowerCase(),
-            product_data: {
-              name: product.title,
-              description: product.description
+    let session;
+    try {
+      const stripe = getStripe();
+      
+      // A retry replaces the user's previous session so it cannot be paid as well
+      if (previousSession) {
+        await expireSession(stripe, previousSession);
+        previousOpen = false;
+      }
+      
+      // Create checkout session; it expires together with the hold
+      session = await callStripe(options => stripe.checkout.sessions.create({
+        payment_method_types: ['card'],
+        mode: 'payment',
+        expires_at: Math.floor((Date.now() + inventory.SESSION_TTL_MS) / 1000),
+        line_items: [
+          {
+            price_data: {
+              currency: (product.currency || 'eur').toLowerCase(),
+              product_data: {
+                name: product.title,
+                description: product.description
+              },
+              unit_amount: Math.round(product.price * 100)
             },
-            unit_amount: Math.round(product.price * 100)
-          },
-          quantity: 1
-        }
-      ],
-      metadata: {
-        user_id: req.user._id.toString(),
-        product_id: product_id,
-        type: 'product'
-      },
-      success_url: `${origin_url}/dashboard?session_id={CHECKOUT_SESSION_ID}`,
-      cancel_url: `${origin_url}/shop`
-    });
+            quantity: 1
+          }
+        ],
+        metadata: {
+          user_id: req.user._id.toString(),
+          product_id: product_id,
+          type: 'product'
+        },
+        success_url: `${origin_url}/dashboard?session_id={CHECKOUT_SESSION_ID}`,
+        cancel_url: `${origin_url}/shop`
+      }, options));
+    } catch (error) {
+      // Detached so it runs even when the request budget is spent (otherwise the hold lasts
+      // until the sweeper). A previous session that may still be open keeps the hold instead,
+      // so its expiry webhook releases it.
+      await deadline.detached(() => (previousOpen
+        ? inventory.attachSession(product_id, userId, previousSession, product.reserved_until)
+        : inventory.release(product_id, { userId })));
+      throw error;
+    }
     
-    res.json({ checkout_url: session.url, session_id: session.id });
+    // The session exists at Stripe now; tie it to the hold even if the budget ran out meanwhile,
+    // otherwise its expiry webhook cannot release the hold
+    await deadline.detached(() => inventory.attachSession(product_id, userId, session.id, product.reserved_until));
+    res.json({ checkout_url: session.url, session_id: session.id, reserved_until: product.reserved_until });
   } catch (error) {
     console.error('Product checkout error:', error);
-    res.status(500).json({ detail: error.message || 'Payment error' });
+    res.status(error.status || 500).json({ detail: error.message || 'Payment error' });
   }
 });
 
@@ -112,24 +214,23 @@ router.post('/checkout/product', auth, async (req, res) => {
 router.get('/status/:sessionId', auth, async (req, res) => {
   try {
     const stripe = getStripe();
-    const session = await stripe.checkout.sessions.retrieve(req.params.sessionId);
+    const session = await callStripe(options => stripe.checkout.sessions.retrieve(req.params.sessionId, options));
     
     // If payment successful, update user
     if (session.payment_status === 'paid') {
       const { user_id, program_id, product_id, type } = session.metadata;
       
       if (type === 'subscription' && program_id) {
-        await User.findByIdAndUpdate(
+        const user = await User.findByIdAndUpdate(
           user_id,
-          { $addToSet: { subscriptions: program_id } }
+          { $addToSet: { subscriptions: program_id } },
+          { new: true }
         );
+        if (user) entitlements.setUser(user);
       }
       
       if (type === 'product' && product_id) {
-        await ShopProduct.findByIdAndUpdate(
-          product_id,
-          { is_available: false }
-        );
+        await fulfilProduct(product_id);
       }
     }
     
@@ -139,7 +240,7 @@ router.get('/status/:sessionId', auth, async (req, res) => {
     });
   } catch (error) {
     console.error('Payment status error:', error);
-    res.status(500).json({ detail: error.message || 'Status check error' });
+    res.status(error.status || 500).json({ detail: error.message || 'Status check error' });
   }
 });
 
@@ -164,19 +265,26 @@ router.post('/webhook', express.raw({ type: 'application/json' }), async (req, r
         const { user_id, program_id, product_id, type } = session.metadata;
         
         if (type === 'subscription' && program_id) {
-          await User.findByIdAndUpdate(
+          const user = await User.findByIdAndUpdate(
             user_id,
-            { $addToSet: { subscriptions: program_id } }
+            { $addToSet: { subscriptions: program_id } },
+            { new: true }
           );
+          if (user) entitlements.setUser(user);
         }
         
         if (type === 'product' && product_id) {
-          await ShopProduct.findByIdAndUpdate(
-            product_id,
-            { is_available: false }
-          );
+          await fulfilProduct(product_id);
+        }
+        break;
+      
+      case 'checkout.session.expired': {
+        const expired = event.data.object;
+        if (expired.metadata?.type === 'product' && expired.metadata.product_id) {
+          await inventory.release(expired.metadata.product_id, { sessionId: expired.id });
         }
         break;
+      }
     }
     
     res.json({ received: true });
@@ -1,4 +1,5 @@
 const express = require('express');
+const mongoose = require('mongoose');
 const Program = require('../models/Program');
 const Course = require('../models/Course');
 const Lesson = require('../models/Lesson');
@@ -8,6 +9,11 @@ const Result = require('../models/Result');
 const Settings = require('../models/Settings');
 const AnalyticsEvent = require('../models/AnalyticsEvent');
 const { auth } = require('../middleware/auth');
+const { rateLimit } = require('../middleware/rateLimit');
+const entitlements = require('../services/entitlements');
+const playback = require('../services/playback');
+const search = require('../services/search');
+const { findSerialized } = require('../services/serializers');
 
 const router = express.Router();
 
@@ -16,7 +22,7 @@ const router = express.Router();
 // Get all programs
 router.get('/programs', async (req, res) => {
   try {
-    const programs = await Program.find().sort({ created_at: -1 });
+    const programs = await findSerialized(req, Program.find().sort({ created_at: -1 }));
     res.json(programs);
   } catch (error) {
     console.error('Get programs error:', error);
@@ -31,11 +37,10 @@ router.get('/courses', async (req, res) => {
     const filter = {}; // Prikazuje sve dok ne podesiš is_active u bazi
     if (program_id) filter.program_id = program_id;
     
-    const courses = await Course.find(filter).sort({ order: 1 });
+    const courses = await findSerialized(req, Course.find(filter).sort({ order: 1 }));
     
-    const coursesWithInfo = await Promise.all(courses.map(async (course) => {
-      const lessonCount = await Lesson.countDocuments({ course_id: course._id.toString() });
-      const courseJson = course.toJSON();
+    const coursesWithInfo = await Promise.all(courses.map(async (courseJson) => {
+      const lessonCount = await Lesson.countDocuments({ course_id: courseJson.id });
       courseJson.lesson_count = lessonCount;
       return courseJson;
     }));
@@ -47,8 +52,112 @@ router.get('/courses', async (req, res) => {
   }
 });
 
+// Get course detail with lessons (requires access)
+router.get('/courses/:id', auth, async (req, res) => {
+  try {
+    const { id } = req.params;
+    if (!mongoose.isValidObjectId(id)) {
+      return res.status(404).json({ detail: 'Course not found' });
+    }
+
+    if (!entitlements.canAccessCourse(req.user, id)) {
+      return res.status(403).json({ detail: 'Nemate pristup ovom kursu' });
+    }
+
+    const course = await Course.findById(id);
+    if (!course) {
+      return res.status(404).json({ detail: 'Course not found' });
+    }
+
+    const lessons = await Lesson.find({ course_id: id }).sort({ order: 1 });
+    const courseJson = course.toJSON();
+    courseJson.lessons = lessons.map(l => l.toJSON());
+    courseJson.lesson_count = lessons.length;
+    res.json(courseJson);
+  } catch (error) {
+    console.error('Get course error:', error);
+    res.status(500).json({ detail: 'Server error' });
+  }
+});
+
+// Get lessons for a course (only free lessons without access)
+router.get('/lessons/:courseId', auth, async (req, res) => {
+  try {
+    const { courseId } = req.params;
+    const filter = { course_id: courseId };
+    if (!entitlements.canAccessCourse(req.user, courseId)) filter.is_free = true;
+
+    const lessons = await Lesson.find(filter).sort({ order: 1 });
+    res.json(lessons);
+  } catch (error) {
+    console.error('Get lessons error:', error);
+    res.status(500).json({ detail: 'Server error' });
+  }
+});
+
+// Get single lesson (free lessons skip the access check)
+router.get('/lesson/:id', auth, async (req, res) => {
+  try {
+    if (!mongoose.isValidObjectId(req.params.id)) {
+      return res.status(404).json({ detail: 'Lesson not found' });
+    }
+
+    const lesson = await Lesson.findById(req.params.id);
+    if (!lesson) {
+      return res.status(404).json({ detail: 'Lesson not found' });
+    }
+
+    if (!lesson.is_free && !entitlements.canAccessCourse(req.user, lesson.course_id)) {
+      return res.status(403).json({ detail: 'Nemate pristup ovoj lekciji' });
+    }
+
+    res.json(lesson);
+  } catch (error) {
+    console.error('Get lesson error:', error);
+    res.status(500).json({ detail: 'Server error' });
+  }
+});
+
+// Get playback token for a single lesson
+router.get('/lesson/:id/playback', auth, async (req, res) => {
+  try {
+    if (!mongoose.isValidObjectId(req.params.id)) {
+      return res.status(404).json({ detail: 'Lesson not found' });
+    }
+
+    const lesson = await Lesson.findById(req.params.id, { course_id: 1, is_free: 1, video_url: 1, mux_playback_id: 1 }).lean();
+    if (!lesson) {
+      return res.status(404).json({ detail: 'Lesson not found' });
+    }
+
+    if (!lesson.is_free && !entitlements.canAccessCourse(req.user, lesson.course_id)) {
+      return res.status(403).json({ detail: 'Nemate pristup ovoj lekciji' });
+    }
+
+    res.json(playback.issue(req.user._id.toString(), lesson));
+  } catch (error) {
+    console.error('Lesson playback error:', error);
+    res.status(500).json({ detail: 'Server error' });
+  }
+});
+
+// Batch playback tokens for a whole course outline
+router.get('/courses/:id/playback', auth, async (req, res) => {
+  try {
+    const { id } = req.params;
+    const filter = { course_id: id };
+    if (!entitlements.canAccessCourse(req.user, id)) filter.is_free = true;
+
+    const lessons = await Lesson.find(filter, { is_free: 1, video_url: 1, mux_playback_id: 1 }).lean();
+    res.json(playback.issueForLessons(req.user._id.toString(), lessons));
+  } catch (error) {
+    console.error('Course playback error:', error);
+    res.status(500).json({ detail: 'Server error' });
+  }
+});
+
 // Track analytics event (FIX za 405 error)
-router.post('/analytics/event', async (req, res) => {
+router.post('/analytics/event', rateLimit('analytics'), async (req, res) => {
   try {
     const event = new AnalyticsEvent(req.body);
     await event.save();
@@ -59,13 +168,35 @@ router.post('/analytics/event', async (req, res) => {
   }
 });
 
+// Search programs, courses, lessons and shop products
+router.get('/search', (req, res) => {
+  try {
+    const { q = '', type, category } = req.query;
+    const page = Math.max(parseInt(req.query.page, 10) || 1, 1);
+    const limit = Math.min(Math.max(parseInt(req.query.limit, 10) || 20, 1), 50);
+
+    let types;
+    if (type) {
+      types = String(type).split(',').map(t => t.trim());
+      if (types.some(t => !search.TYPES.includes(t))) {
+        return res.status(400).json({ detail: `Invalid type, expected one of: ${search.TYPES.join(', ')}` });
+      }
+    }
+
+    res.json(search.search({ q: String(q), types, category, page, limit }));
+  } catch (error) {
+    console.error('Search error:', error);
+    res.status(500).json({ detail: 'Server error' });
+  }
+});
+
 // Get shop products
 router.get('/shop/products', async (req, res) => {
   try {
     const { category } = req.query;
     const filter = {};
     if (category) filter.category = category;
-    const products = await ShopProduct.find(filter).sort({ created_at: -1 });
+    const products = await findSerialized(req, ShopProduct.find(filter).sort({ created_at: -1 }));
     res.json(products);
   } catch (error) {
     res.status(500).json({ detail: 'Server error' });
@@ -88,12 +219,12 @@ router.get('/settings', async (req, res) => {
 
 // Ostale rute (FAQs i Results)
 router.get('/faqs', async (req, res) => {
-  const faqs = await FAQ.find().sort({ order: 1 });
+  const faqs = await findSerialized(req, FAQ.find().sort({ order: 1 }));
   res.json(faqs);
 });
 
 router.get('/results', async (req, res) => {
-  const results = await Result.find().sort({ order: 1 });
+  const results = await findSerialized(req, Result.find().sort({ order: 1 }));
   res.json(results);
 });
 
@@ -0,0 +1,138 @@
+const express = require('express');
+const fs = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+const { pipeline } = require('stream/promises');
+const busboy = require('busboy');
+const { adminAuth } = require('../middleware/auth');
+const imagePool = require('../services/imagePool');
+
+const router = express.Router();
+
+const UPLOAD_DIR = process.env.UPLOAD_DIR || path.join(__dirname, '..', 'uploads');
+const PUBLIC_PATH = '/uploads';
+const MAX_UPLOAD_BYTES = parseInt(process.env.MAX_UPLOAD_MB || '15', 10) * 1024 * 1024;
+const VARIANT_WIDTHS = [320, 640, 1280];
+const VARIANT_FORMATS = ['webp', 'avif'];
+
+const EXTENSIONS = {
+  'image/jpeg': 'jpg',
+  'image/png': 'png',
+  'image/webp': 'webp',
+  'image/avif': 'avif',
+  'image/gif': 'gif'
+};
+
+// Stream the single "file" field straight to disk; nothing is buffered in memory
+const receiveFile = (req, targetDir) => new Promise((resolve, reject) => {
+  let bb;
+  try {
+    bb = busboy({ headers: req.headers, limits: { files: 1, fileSize: MAX_UPLOAD_BYTES } });
+  } catch (error) {
+    return reject(Object.assign(error, { status: 400 }));
+  }
+
+  let upload = null;
+  let written = null;
+  let settled = false;
+
+  const done = (result) => {
+    if (settled) return;
+    settled = true;
+    resolve(result);
+  };
+
+  // Stop parsing, close the file being written, then reject so the caller can remove targetDir
+  const fail = (error) => {
+    if (settled) return;
+    settled = true;
+    req.unpipe(bb);
+    req.resume();
+    if (upload) upload.destroy();
+    bb.destroy();
+    (written || Promise.resolve()).catch(() => {}).then(() => reject(error));
+  };
+
+  bb.on('file', (field, file, info) => {
+    const extension = EXTENSIONS[info.mimeType];
+    if (field !== 'file' || !extension) {
+      file.resume();
+      return;
+    }
+
+    const target = path.join(targetDir, `original.${extension}`);
+    let truncated = false;
+    upload = file;
+    file.on('limit', () => { truncated = true; });
+    written = pipeline(file, fs.createWriteStream(target))
+      .then(() => ({ path: target, file: `original.${extension}`, mimeType: info.mimeType, truncated }));
+    // Disk errors (ENOSPC, EACCES) end the upload now instead of after the whole body
+    written.catch(fail);
+  });
+
+  bb.on('error', (error) => fail(Object.assign(error, { status: 400 })));
+  bb.on('close', () => {
+    if (!written) return done(null);
+    written.then(done, fail);
+  });
+
+  // pipe() does not forward errors; a dropped connection would leave busboy waiting forever
+  req.on('aborted', () => fail(Object.assign(new Error('Upload prekinut'), { status: 400 })));
+  req.on('error', (error) => fail(Object.assign(error, { status: 400 })));
+
+  req.pipe(bb);
+});
+
+// Upload an image and generate resized WebP/AVIF variants
+router.post('/', adminAuth, async (req, res) => {
+  const id = crypto.randomBytes(12).toString('hex');
+  const targetDir = path.join(UPLOAD_DIR, id);
+
+  try {
+    await fs.promises.mkdir(targetDir, { recursive: true });
+    const upload = await receiveFile(req, targetDir);
+
+    if (!upload) {
+      await fs.promises.rm(targetDir, { recursive: true, force: true });
+      return res.status(400).json({ detail: 'Pošaljite sliku u polju "file" (jpg, png, webp, avif, gif)' });
+    }
+    if (upload.truncated) {
+      await fs.promises.rm(targetDir, { recursive: true, force: true });
+      return res.status(413).json({ detail: `Fajl je veći od ${MAX_UPLOAD_BYTES / 1024 / 1024}MB` });
+    }
+
+    const result = await imagePool.resize({
+      input: upload.path,
+      outputDir: targetDir,
+      widths: VARIANT_WIDTHS,
+      formats: VARIANT_FORMATS
+    }).catch(error => {
+      throw Object.assign(error, { status: 400 });
+    });
+
+    const baseUrl = `${PUBLIC_PATH}/${id}`;
+    res.status(201).json({
+      id,
+      url: `${baseUrl}/${upload.file}`,
+      width: result.width,
+      height: result.height,
+      variants: result.variants.map(v => ({ ...v, file: undefined, url: `${baseUrl}/${v.file}` }))
+    });
+  } catch (error) {
+    console.error('Upload error:', error);
+    await fs.promises.rm(targetDir, { recursive: true, force: true }).catch(() => {});
+    res.status(error.status || 500).json({ detail: error.status ? error.message : 'Upload error' });
+  }
+});
+
+// Files are written once under a random id, so they can be cached forever
+const serveUploads = express.static(UPLOAD_DIR, {
+  immutable: true,
+  maxAge: '1y',
+  index: false,
+  fallthrough: false
+});
+
+module.exports = router;
+module.exports.serveUploads = serveUploads;
+module.exports.PUBLIC_PATH = PUBLIC_PATH;
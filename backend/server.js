@@ -5,6 +5,9 @@ const cors = require('cors');
 const path = require('path');
 const http = require('http');
 
+// Prije modela: deadline plugin (maxTimeMS) mora biti na svim šemama
+const deadline = require('./services/deadline');
+
 // DODANO: Model za kreiranje Admina
 const User = require('./models/User'); 
 
@@ -13,6 +16,14 @@ const authRoutes = require('./routes/auth');
 const adminRoutes = require('./routes/admin');
 const publicRoutes = require('./routes/public');
 const paymentRoutes = require('./routes/payments');
+const uploadRoutes = require('./routes/uploads');
+
+// Servisi
+const entitlements = require('./services/entitlements');
+const search = require('./services/search');
+const loadMonitor = require('./services/loadMonitor');
+const prerender = require('./services/prerender');
+const inventory = require('./services/inventory');
 
 const app = express();
 const server = http.createServer(app);
@@ -22,6 +33,11 @@ const PORT = process.env.PORT || 3000;
    MIDDLEWARE
 ========================================== */
 
+// Iza nginx-a: req.ip uzima X-Forwarded-For
+app.set('trust proxy', 'loopback');
+
+app.use('/api', loadMonitor.trackInFlight);
+
 // Webhook mora biti PRVI
 app.post('/api/payments/webhook', express.raw({ type: 'application/json' }));
 
@@ -30,8 +46,14 @@ app.use(cors({
   credentials: true
 }));
 
-app.use(express.json({ limit: '50mb' }));
-app.use(express.urlencoded({ extended: true, limit: '50mb' }));
+// Slike idu kroz /api/uploads (multipart stream), JSON ostaje mali
+app.use(express.json({ limit: '1mb' }));
+app.use(express.urlencoded({ extended: true, limit: '1mb' }));
+
+// Svaki API zahtjev dobija vremenski budžet (REQUEST_BUDGET_MS); kad istekne vraća se 504
+app.use('/api', deadline.middleware);
+// Mjeri koliko svaki zahtjev drži event loop, samo ako je BLOCKED_LOOP_THRESHOLD_MS > 0
+app.use('/api', loadMonitor.watchBlocking);
 
 /* ==========================================
    RUTE
@@ -39,18 +61,21 @@ app.use(express.urlencoded({ extended: true, limit: '50mb' }));
 app.use('/api/auth', authRoutes);
 app.use('/api/admin', adminRoutes);
 app.use('/api/payments', paymentRoutes);
+app.use('/api/uploads', uploadRoutes);
 app.use('/api', publicRoutes);
 
 /* ==========================================
    STATIC FILES
 ========================================== */
-app.use(express.static(path.join(__dirname, 'public')));
+app.use(uploadRoutes.PUBLIC_PATH, uploadRoutes.serveUploads);
+// index: false -> i "/" ide kroz prerender ispod
+app.use(express.static(path.join(__dirname, 'public'), { index: false }));
 
 app.get('*', (req, res) => {
   if (req.originalUrl.startsWith('/api')) {
     return res.status(404).json({ message: 'API endpoint not found' });
   }
-  res.sendFile(path.join(__dirname, 'public', 'index.html'));
+  prerender.send(req, res);
 });
 
 /* ==========================================
@@ -92,6 +117,14 @@ mongoose.connect(process.env.MONGO_URL)
   }
   // --- AUTOMATSKI ADMIN ACCOUNT END ---
 
+  try {
+    await entitlements.load();
+    await search.load();
+    inventory.startSweeper();
+  } catch (error) {
+    console.error('⚠️ Greška pri učitavanju pristupa:', error.message);
+  }
+
   server.listen(PORT, '0.0.0.0', () => {
     console.log(`🚀 Server radi na portu ${PORT}`);
   });
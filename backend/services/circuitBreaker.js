@@ -0,0 +1,66 @@
+const { ServiceUnavailableError } = require('./deadline');
+
+// Circuit breaker for an outbound dependency. After `failureThreshold` consecutive failures
+// the circuit opens and calls fail immediately with 503 instead of waiting on a dead service.
+// After `resetTimeoutMs` one trial call is let through (half-open); success closes the circuit.
+// isFailure(error) returns true (counts), false (the dependency answered) or null (says nothing
+// about the dependency, e.g. the caller's own budget cut the call short).
+
+class CircuitBreaker {
+  constructor(name, { failureThreshold = 5, resetTimeoutMs = 30000, isFailure = () => true } = {}) {
+    this.name = name;
+    this.failureThreshold = failureThreshold;
+    this.resetTimeoutMs = resetTimeoutMs;
+    this.isFailure = isFailure;
+    this.state = 'closed';
+    this.failures = 0;
+    this.openedAt = 0;
+    this.trialInFlight = false;
+  }
+
+  async exec(fn) {
+    let trial = false;
+    if (this.state !== 'closed') {
+      const cooling = this.state === 'open' && Date.now() - this.openedAt < this.resetTimeoutMs;
+      if (cooling || this.trialInFlight) {
+        throw new ServiceUnavailableError(`${this.name} unavailable`);
+      }
+      this.state = 'half-open';
+      this.trialInFlight = trial = true;
+    }
+
+    try {
+      const result = await fn();
+      this.onSuccess();
+      return result;
+    } catch (error) {
+      const failure = this.isFailure(error);
+      if (failure) {
+        this.onFailure();
+      } else if (failure === false) {
+        // The dependency answered (e.g. a 4xx), so it is healthy
+        this.onSuccess();
+      }
+      throw error;
+    } finally {
+      if (trial) this.trialInFlight = false;
+    }
+  }
+
+  onSuccess() {
+    if (this.state !== 'closed') console.log(`🔌 ${this.name} circuit closed`);
+    this.state = 'closed';
+    this.failures = 0;
+  }
+
+  onFailure() {
+    this.failures++;
+    if (this.state === 'half-open' || this.failures >= this.failureThreshold) {
+      if (this.state !== 'open') console.warn(`🔌 ${this.name} circuit open after ${this.failures} failures`);
+      this.state = 'open';
+      this.openedAt = Date.now();
+    }
+  }
+}
+
+module.exports = CircuitBreaker;
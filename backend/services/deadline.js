@@ -0,0 +1,128 @@
+const { AsyncLocalStorage } = require('async_hooks');
+const mongoose = require('mongoose');
+
+// Per-request deadline budgets. Every /api request gets a budget; it follows the request
+// through async calls (AsyncLocalStorage), every Mongo query gets maxTimeMS from what is left,
+// and outbound calls take their timeout from it. When the budget runs out the client gets a 504
+// straight away and whatever the handler sends later is dropped.
+//
+// Must be required before any model is compiled so the Mongoose plugin applies to all schemas.
+
+const DEFAULT_BUDGET_MS = parseInt(process.env.REQUEST_BUDGET_MS || '10000', 10);
+// Streaming uploads legitimately take longer than a normal API call
+const ROUTE_BUDGETS_MS = {
+  '/uploads': parseInt(process.env.UPLOAD_REQUEST_BUDGET_MS || '60000', 10)
+};
+
+const storage = new AsyncLocalStorage();
+
+class DeadlineExceededError extends Error {
+  constructor(message = 'Request timed out') {
+    super(message);
+    this.name = 'DeadlineExceededError';
+    this.status = 504;
+  }
+}
+
+class ServiceUnavailableError extends Error {
+  constructor(message = 'Service unavailable') {
+    super(message);
+    this.name = 'ServiceUnavailableError';
+    this.status = 503;
+  }
+}
+
+const budgetFor = (path) => {
+  const prefix = Object.keys(ROUTE_BUDGETS_MS).find(p => path.startsWith(p));
+  return prefix ? ROUTE_BUDGETS_MS[prefix] : DEFAULT_BUDGET_MS;
+};
+
+// Drop anything the handler sends after the 504 went out (it would throw ERR_HTTP_HEADERS_SENT)
+const silence = (res) => {
+  res.status = () => res;
+  res.set = () => res;
+  res.json = () => res;
+  res.send = () => res;
+};
+
+const middleware = (req, res, next) => {
+  const budgetMs = budgetFor(req.path);
+  const ctx = { req, deadline: Date.now() + budgetMs, expired: false };
+
+  ctx.expire = () => {
+    if (ctx.expired) return;
+    ctx.expired = true;
+    clearTimeout(timer);
+    if (!res.headersSent) {
+      res.status(504).json({ detail: 'Request timed out' });
+    }
+    silence(res);
+  };
+
+  const timer = setTimeout(() => {
+    console.warn(`Deadline exceeded (${budgetMs}ms): ${req.method} ${req.originalUrl}`);
+    ctx.expire();
+  }, budgetMs);
+  res.on('finish', () => clearTimeout(timer));
+  res.on('close', () => clearTimeout(timer));
+
+  storage.run(ctx, next);
+};
+
+// Context of the request being handled ({ req, deadline, ... }), or undefined outside one
+const current = () => storage.getStore();
+
+// Timeout for one dependency call: the remaining budget, capped at `capMs`.
+// Throws (and answers 504) when nothing is left.
+const timeoutFor = (capMs) => {
+  const ctx = storage.getStore();
+  if (!ctx) return capMs;
+  const left = ctx.deadline - Date.now();
+  if (ctx.expired || left <= 0) {
+    ctx.expire();
+    throw new DeadlineExceededError();
+  }
+  return capMs ? Math.min(capMs, left) : left;
+};
+
+// Run work that must finish even after the request gave up (e.g. releasing a product hold)
+const detached = (fn) => storage.exit(fn);
+
+const QUERY_OPS = [
+  'find', 'findOne', 'countDocuments', 'estimatedDocumentCount', 'distinct',
+  'findOneAndUpdate', 'findOneAndDelete', 'findOneAndReplace',
+  'updateOne', 'updateMany', 'deleteOne', 'deleteMany', 'replaceOne'
+];
+
+const deadlinePlugin = (schema) => {
+  schema.pre(QUERY_OPS, function () {
+    if (!storage.getStore()) return;
+    const ms = Math.ceil(timeoutFor());
+    const current = this.getOptions().maxTimeMS;
+    this.maxTimeMS(current ? Math.min(current, ms) : ms);
+  });
+
+  schema.pre('aggregate', function () {
+    if (!storage.getStore()) return;
+    const ms = Math.ceil(timeoutFor());
+    const current = this.options.maxTimeMS;
+    this.option({ maxTimeMS: current ? Math.min(current, ms) : ms });
+  });
+
+  // Inserts take no maxTimeMS; at least don't start one after the budget is gone
+  schema.pre('save', function () {
+    if (storage.getStore()) timeoutFor();
+  });
+};
+
+mongoose.plugin(deadlinePlugin);
+
+module.exports = {
+  DEFAULT_BUDGET_MS,
+  DeadlineExceededError,
+  ServiceUnavailableError,
+  middleware,
+  current,
+  timeoutFor,
+  detached
+};
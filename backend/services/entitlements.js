@@ -0,0 +1,116 @@
+const Course = require('../models/Course');
+const User = require('../models/User');
+
+// In-memory index: user -> set of course ids the user can open.
+// Access comes from two places (User.courses and User.subscriptions -> Program -> Course),
+// so instead of joining on every request we keep both sides indexed and update them
+// when grants or course/program assignments change.
+
+const courseProgram = new Map();   // courseId -> programId
+const programCourses = new Map();  // programId -> Set(courseId)
+const programUsers = new Map();    // programId -> Set(userId)
+const userGrants = new Map();      // userId -> { subscriptions: Set, courses: Set }
+const userAccess = new Map();      // userId -> Set(courseId)
+
+const addToSetMap = (map, key, value) => {
+  if (!map.has(key)) map.set(key, new Set());
+  map.get(key).add(value);
+};
+
+const removeFromSetMap = (map, key, value) => {
+  const set = map.get(key);
+  if (!set) return;
+  set.delete(value);
+  if (set.size === 0) map.delete(key);
+};
+
+const rebuildUserAccess = (userId) => {
+  const grants = userGrants.get(userId);
+  if (!grants) return;
+  const access = new Set(grants.courses);
+  grants.subscriptions.forEach(programId => {
+    (programCourses.get(programId) || []).forEach(courseId => access.add(courseId));
+  });
+  userAccess.set(userId, access);
+};
+
+// Register or refresh a course's program assignment
+const setCourse = (course) => {
+  const courseId = (course._id || course.id).toString();
+  const programId = course.program_id || '';
+  const previous = courseProgram.get(courseId);
+  if (previous === programId) return;
+
+  if (previous) removeFromSetMap(programCourses, previous, courseId);
+  if (programId) addToSetMap(programCourses, programId, courseId);
+  courseProgram.set(courseId, programId);
+
+  // Only users subscribed to the old or new program are affected
+  const affected = new Set([
+    ...(programUsers.get(previous) || []),
+    ...(programUsers.get(programId) || [])
+  ]);
+  affected.forEach(rebuildUserAccess);
+};
+
+const removeCourse = (courseId) => {
+  courseId = courseId.toString();
+  const programId = courseProgram.get(courseId);
+  courseProgram.delete(courseId);
+  if (programId) {
+    removeFromSetMap(programCourses, programId, courseId);
+    (programUsers.get(programId) || []).forEach(rebuildUserAccess);
+  }
+  userAccess.forEach(access => access.delete(courseId));
+};
+
+// Register or refresh a user's subscriptions/course grants
+const setUser = (user) => {
+  const userId = user._id.toString();
+  const previous = userGrants.get(userId);
+  if (previous) {
+    previous.subscriptions.forEach(programId => removeFromSetMap(programUsers, programId, userId));
+  }
+
+  const grants = {
+    subscriptions: new Set((user.subscriptions || []).map(String)),
+    courses: new Set((user.courses || []).map(String))
+  };
+  grants.subscriptions.forEach(programId => addToSetMap(programUsers, programId, userId));
+  userGrants.set(userId, grants);
+  rebuildUserAccess(userId);
+};
+
+// Check access for an authenticated user document (req.user).
+// Users that are not indexed yet (registered after load, or on another worker) are indexed on first use.
+const canAccessCourse = (user, courseId) => {
+  if (user.role === 'admin') return true;
+  const userId = user._id.toString();
+  if (!userGrants.has(userId)) setUser(user);
+  return userAccess.get(userId).has(courseId.toString());
+};
+
+// Build the full index once after the DB connection is up
+const load = async () => {
+  courseProgram.clear();
+  programCourses.clear();
+  programUsers.clear();
+  userGrants.clear();
+  userAccess.clear();
+
+  const courses = await Course.find({}, { program_id: 1 }).lean();
+  courses.forEach(setCourse);
+
+  const users = await User.find({}, { subscriptions: 1, courses: 1 }).lean();
+  users.forEach(setUser);
+
+  console.log(`🔑 Entitlements: ${users.length} korisnika, ${courses.length} kurseva indeksirano`);
+};
+
+module.exports = {
+  load,
+  setCourse,
+  removeCourse,
+  setUser,
+  canAccessCourse
+};
@@ -0,0 +1,73 @@
+const os = require('os');
+const path = require('path');
+const { Worker } = require('worker_threads');
+
+// Small fixed-size worker_threads pool so image resizing never runs on the request thread
+
+const POOL_SIZE = parseInt(process.env.IMAGE_WORKERS || String(Math.max(1, Math.min(2, os.cpus().length - 1))), 10);
+const WORKER_FILE = path.join(__dirname, 'imageWorker.js');
+
+const idle = [];
+const queue = [];
+const pending = new Map(); // task id -> { resolve, reject, worker }
+let workerCount = 0;
+let nextId = 1;
+
+const spawn = () => {
+  const worker = new Worker(WORKER_FILE);
+  worker.unref();
+  workerCount++;
+
+  worker.on('message', (message) => {
+    const task = pending.get(message.id);
+    pending.delete(message.id);
+    if (task) {
+      if (message.error) task.reject(new Error(message.error));
+      else task.resolve(message);
+    }
+    release(worker);
+  });
+
+  // A crashed worker fails its task and is replaced on the next run
+  worker.on('error', (error) => {
+    pending.forEach((task, id) => {
+      if (task.worker === worker) {
+        pending.delete(id);
+        task.reject(error);
+      }
+    });
+  });
+  worker.on('exit', () => {
+    workerCount--;
+    const index = idle.indexOf(worker);
+    if (index !== -1) idle.splice(index, 1);
+    drain();
+  });
+
+  return worker;
+};
+
+const dispatch = (worker, task) => {
+  pending.set(task.message.id, { ...task, worker });
+  worker.postMessage(task.message);
+};
+
+const release = (worker) => {
+  const task = queue.shift();
+  if (task) dispatch(worker, task);
+  else idle.push(worker);
+};
+
+const drain = () => {
+  while (queue.length > 0 && (idle.length > 0 || workerCount < POOL_SIZE)) {
+    dispatch(idle.pop() || spawn(), queue.shift());
+  }
+};
+
+// Resize `input` into outputDir/<width>.<format> for every combination
+const resize = ({ input, outputDir, widths, formats }) => new Promise((resolve, reject) => {
+  queue.push({ message: { id: nextId++, input, outputDir, widths, formats }, resolve, reject });
+  drain();
+});
+
+module.exports = { resize };
@@ -0,0 +1,32 @@
+const path = require('path');
+const { parentPort } = require('worker_threads');
+const sharp = require('sharp');
+
+// Runs inside a worker thread: resizes one uploaded image into every width/format variant
+
+const QUALITY = { webp: 80, avif: 55 };
+
+parentPort.on('message', async ({ id, input, outputDir, widths, formats }) => {
+  try {
+    const metadata = await sharp(input).metadata();
+    const variants = [];
+
+    for (const width of widths) {
+      // Never upscale, small originals only get the sizes they can fill
+      if (metadata.width && width > metadata.width && width !== widths[0]) continue;
+      for (const format of formats) {
+        const file = `${width}.${format}`;
+        const info = await sharp(input)
+          .rotate()
+          .resize({ width, withoutEnlargement: true })
+          .toFormat(format, { quality: QUALITY[format] })
+          .toFile(path.join(outputDir, file));
+        variants.push({ format, width: info.width, height: info.height, size: info.size, file });
+      }
+    }
+
+    parentPort.postMessage({ id, variants, width: metadata.width, height: metadata.height });
+  } catch (error) {
+    parentPort.postMessage({ id, error: error.message });
+  }
+});
@@ -0,0 +1,98 @@
+const deadline = require('./deadline');
+const ShopProduct = require('../models/ShopProduct');
+
+// Atomic reservation of one-of-a-kind shop products during checkout.
+// A product is held for one user while their Stripe session is open; the hold is a
+// conditional findOneAndUpdate, so concurrent checkouts get exactly one winner.
+
+// Stripe rejects expires_at less than 30 minutes out, measured on their clock when the request
+// arrives; the extra minute absorbs clock skew and request latency. The hold outlives the session slightly.
+const STRIPE_MIN_TTL_MINUTES = 30;
+const TTL_MARGIN_MINUTES = 1;
+const SESSION_TTL_MS = Math.max(
+  parseInt(process.env.CHECKOUT_SESSION_TTL_MINUTES, 10) || 0,
+  STRIPE_MIN_TTL_MINUTES + TTL_MARGIN_MINUTES
+) * 60 * 1000;
+const HOLD_GRACE_MS = 60 * 1000;
+const HOLD_MS = SESSION_TTL_MS + HOLD_GRACE_MS;
+// A hold without a session is still being set up by the request that took it, for at most
+// one request budget; until then even its owner (double click, second tab) is turned away
+const CREATE_WINDOW_MS = deadline.DEFAULT_BUDGET_MS;
+const SWEEP_INTERVAL_MS = 60 * 1000;
+
+const freeOrOwnedBy = (userId, now) => ({
+  $or: [
+    { reserved_until: null },
+    { reserved_until: { $lte: now } },
+    {
+      reserved_by: userId,
+      $or: [
+        { reservation_session: { $ne: null } },
+        { reserved_until: { $lte: new Date(now.getTime() + HOLD_MS - CREATE_WINDOW_MS) } }
+      ]
+    }
+  ]
+});
+
+// Returns { product, previousSession } or null if the product is sold or held by someone else.
+// previousSession is the user's own still-open session when they retry a checkout.
+const reserve = async (productId, userId) => {
+  const now = new Date();
+  const reservedUntil = new Date(now.getTime() + HOLD_MS);
+  const previous = await ShopProduct.findOneAndUpdate(
+    { _id: productId, is_available: true, ...freeOrOwnedBy(userId, now) },
+    { $set: { reserved_by: userId, reserved_until: reservedUntil, reservation_session: null } }
+  ).lean();
+  if (!previous) return null;
+
+  const ownOpenHold = previous.reserved_by === userId && previous.reserved_until > now;
+  return {
+    product: { ...previous, reserved_by: userId, reserved_until: reservedUntil, reservation_session: null },
+    previousSession: ownOpenHold ? previous.reservation_session : null
+  };
+};
+
+// Tie the hold to the Stripe session that was created for it. reservedUntil identifies the
+// reservation, so a request that lost its hold to a newer one cannot overwrite it.
+const attachSession = (productId, userId, sessionId, reservedUntil) => ShopProduct.updateOne(
+  { _id: productId, reserved_by: userId, reserved_until: reservedUntil },
+  { $set: { reservation_session: sessionId } }
+);
+
+const clearHold = { $set: { reserved_by: null, reserved_until: null, reservation_session: null } };
+
+// Release a hold; with a sessionId only if the hold still belongs to that session
+const release = (productId, { userId, sessionId } = {}) => {
+  const filter = { _id: productId };
+  if (userId) filter.reserved_by = userId;
+  if (sessionId) filter.reservation_session = sessionId;
+  return ShopProduct.updateOne(filter, clearHold);
+};
+
+const markSold = (productId) => ShopProduct.findByIdAndUpdate(
+  productId,
+  { $set: { is_available: false, reserved_by: null, reserved_until: null, reservation_session: null } },
+  { new: true }
+);
+
+// Expired holds are already ignored by reserve(); sweeping just clears them for the UI
+const sweepExpired = () => ShopProduct.updateMany(
+  { reserved_until: { $ne: null, $lte: new Date() } },
+  clearHold
+);
+
+const startSweeper = () => {
+  setInterval(() => {
+    sweepExpired().catch(error => console.error('Reservation sweep error:', error.message));
+  }, SWEEP_INTERVAL_MS).unref();
+};
+
+module.exports = {
+  SESSION_TTL_MS,
+  reserve,
+  attachSession,
+  release,
+  markSold,
+  sweepExpired,
+  startSweeper
+};
@@ -0,0 +1,153 @@
+const asyncHooks = require('async_hooks');
+const { monitorEventLoopDelay } = require('perf_hooks');
+const deadline = require('./deadline');
+
+// Tracks in-flight API requests and recent event-loop lag, used for admission control.
+// Also keeps event-loop delay percentiles for the admin profiling view. Setting
+// BLOCKED_LOOP_THRESHOLD_MS turns on per-request loop timing and logs requests that kept the
+// loop busy past it; off by default (0), see the cost note at the async hook below.
+
+const SAMPLE_INTERVAL_MS = 1000;
+const WINDOW_MS = 60 * 1000;
+const BLOCK_THRESHOLD_MS = parseFloat(process.env.BLOCKED_LOOP_THRESHOLD_MS || '0');
+const RECENT_BLOCKS = 50;
+const RESOLUTION_MS = 20;
+
+const histogram = monitorEventLoopDelay({ resolution: RESOLUTION_MS });
+histogram.enable();
+const windowHistogram = monitorEventLoopDelay({ resolution: RESOLUTION_MS });
+windowHistogram.enable();
+
+let inFlight = 0;
+let lagMs = 0;
+let lastSecond = null;
+let lastWindow = null;
+const recentBlocks = [];
+
+const round = (ms) => Math.round(ms * 100) / 100;
+
+// Recorded values include the sampling interval itself; report only the delay on top of it
+const delayMs = (ns) => Math.max(0, ns / 1e6 - RESOLUTION_MS);
+
+// Percentiles in ms; null before the first sample
+const summarize = (h) => {
+  if (!h.count) return null;
+  return {
+    min: round(delayMs(h.min)),
+    mean: round(delayMs(h.mean)),
+    p50: round(delayMs(h.percentile(50))),
+    p90: round(delayMs(h.percentile(90))),
+    p99: round(delayMs(h.percentile(99))),
+    max: round(delayMs(h.max)),
+    samples: h.count
+  };
+};
+
+setInterval(() => {
+  // p99 of the last interval, in ms
+  lagMs = delayMs(histogram.percentile(99));
+  lastSecond = summarize(histogram);
+  histogram.reset();
+}, SAMPLE_INTERVAL_MS).unref();
+
+setInterval(() => {
+  lastWindow = summarize(windowHistogram);
+  windowHistogram.reset();
+}, WINDOW_MS).unref();
+
+// Express middleware counting requests until the response is finished or aborted
+const trackInFlight = (req, res, next) => {
+  inFlight++;
+  let done = false;
+  const finish = () => {
+    if (done) return;
+    done = true;
+    inFlight--;
+  };
+  res.on('finish', finish);
+  res.on('close', finish);
+  next();
+};
+
+// ---------- per-request loop time ----------
+
+const nowMs = () => Number(process.hrtime.bigint()) / 1e6;
+
+const charge = (ctx, ms) => {
+  ctx.loopMs = (ctx.loopMs || 0) + ms;
+  if (ms > (ctx.maxBlockMs || 0)) ctx.maxBlockMs = ms;
+};
+
+// Every top-level callback (timers, I/O, promise continuations) is timed and charged to the
+// request whose deadline context it runs in. bcrypt rounds and JSON.stringify show up here.
+// Not free: with the hook enabled, 20k request-shaped tasks (30 awaits + a setImmediate each)
+// took 0.8-1.3s instead of 0.4-0.5s on Node 20, i.e. ~20-40us per request on top of the route.
+// Turn it on while hunting a stall; the lag histogram above stays on either way.
+let depth = 0;
+let callbackStart = 0;
+if (BLOCK_THRESHOLD_MS > 0) {
+  asyncHooks.createHook({
+    before() {
+      if (depth++ === 0) callbackStart = nowMs();
+    },
+    after() {
+      if (depth === 0 || --depth !== 0) return;
+      const ctx = deadline.current();
+      if (ctx) charge(ctx, nowMs() - callbackStart);
+    }
+  }).enable();
+}
+
+const routeOf = (req) => req.route
+  ? `${req.baseUrl}${req.route.path}`
+  : req.originalUrl.split('?')[0];
+
+const report = (req, res, ctx) => {
+  if (!ctx.loopMs || ctx.loopMs < BLOCK_THRESHOLD_MS) return;
+  const entry = {
+    at: new Date().toISOString(),
+    method: req.method,
+    route: routeOf(req),
+    status: res.statusCode,
+    loop_ms: round(ctx.loopMs),
+    max_block_ms: round(ctx.maxBlockMs)
+  };
+  recentBlocks.push(entry);
+  if (recentBlocks.length > RECENT_BLOCKS) recentBlocks.shift();
+  console.warn(`🐢 ${entry.method} ${entry.route} held the event loop ${entry.loop_ms}ms (longest block ${entry.max_block_ms}ms)`);
+};
+
+// Mounted after deadline.middleware. The synchronous part of the route runs inside next(),
+// the rest is charged by the async hook above.
+const watchBlocking = (req, res, next) => {
+  const ctx = deadline.current();
+  if (!ctx || BLOCK_THRESHOLD_MS <= 0) return next();
+  let reported = false;
+  const done = () => {
+    if (reported) return;
+    reported = true;
+    report(req, res, ctx);
+  };
+  res.on('finish', done);
+  res.on('close', done);
+  const start = nowMs();
+  next();
+  charge(ctx, nowMs() - start);
+};
+
+const getLoopDelay = () => ({
+  last_second: lastSecond,
+  current_window: summarize(windowHistogram),
+  last_window: lastWindow,
+  window_seconds: WINDOW_MS / 1000
+});
+
+module.exports = {
+  BLOCK_THRESHOLD_MS,
+  trackInFlight,
+  watchBlocking,
+  getInFlight: () => inFlight,
+  getLagMs: () => lagMs,
+  getLoopDelay,
+  getRecentBlocks: () => recentBlocks.slice().reverse()
+};
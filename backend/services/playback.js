@@ -0,0 +1,134 @@
+const crypto = require('crypto');
+const jwt = require('jsonwebtoken');
+
+// Short-lived signed playback tokens, cached per user + lesson until close to expiry.
+// Signing (RS256 for Mux) is the expensive part, so back-to-back lesson opens reuse the cached token.
+// Without Mux signing keys lessons are played by their public playback id and carry no token.
+
+const TOKEN_TTL_SECONDS = parseInt(process.env.PLAYBACK_TOKEN_TTL || '3600', 10);
+const REFRESH_MARGIN_SECONDS = parseInt(process.env.PLAYBACK_TOKEN_REFRESH_MARGIN || '300', 10);
+const MAX_CACHE_ENTRIES = parseInt(process.env.PLAYBACK_TOKEN_CACHE_SIZE || '10000', 10);
+
+// Mux signed playback (https://docs.mux.com/guides/secure-video-playback)
+const createMuxSigner = (keyId, base64Key) => {
+  const privateKey = Buffer.from(base64Key, 'base64').toString('ascii');
+  return {
+    name: 'mux',
+    sign: ({ playbackId, userId, expiresAt }) => jwt.sign(
+      { sub: playbackId, aud: 'v', exp: expiresAt, uid: userId },
+      privateKey,
+      { algorithm: 'RS256', keyid: keyId, noTimestamp: true }
+    )
+  };
+};
+
+// Local stand-in signer (HMAC) for tests (PLAYBACK_LOCAL_SIGNER=1); Mux would reject its tokens.
+// Uses its own secret, never the auth JWT key; verify() lets tests check tokens.
+const createLocalSigner = (secret = process.env.PLAYBACK_LOCAL_SECRET || crypto.randomBytes(32)) => {
+  const hmac = (payload) => crypto.createHmac('sha256', secret).update(payload).digest('base64url');
+  return {
+    name: 'local',
+    sign: ({ playbackId, userId, expiresAt }) => {
+      const payload = Buffer.from(JSON.stringify({ sub: playbackId, uid: userId, exp: expiresAt })).toString('base64url');
+      return `${payload}.${hmac(payload)}`;
+    },
+    verify: (token) => {
+      const [payload, signature] = (token || '').split('.');
+      if (!payload || !signature) return null;
+      const expected = hmac(payload);
+      if (signature.length !== expected.length ||
+          !crypto.timingSafeEqual(Buffer.from(signature), Buffer.from(expected))) {
+        return null;
+      }
+      const claims = JSON.parse(Buffer.from(payload, 'base64url').toString());
+      return claims.exp > Math.floor(Date.now() / 1000) ? claims : null;
+    }
+  };
+};
+
+// null = unsigned playback (public playback ids)
+const createDefaultSigner = () => {
+  if (process.env.MUX_SIGNING_KEY_ID && process.env.MUX_SIGNING_KEY) {
+    return createMuxSigner(process.env.MUX_SIGNING_KEY_ID, process.env.MUX_SIGNING_KEY);
+  }
+  if (process.env.PLAYBACK_LOCAL_SIGNER === '1') {
+    console.warn('⚠️ PLAYBACK_LOCAL_SIGNER=1: playback tokeni se potpisuju lokalnim ključem, Mux ih neće prihvatiti');
+    return createLocalSigner();
+  }
+  return null;
+};
+
+let signer = createDefaultSigner();
+
+const cache = new Map(); // `${userId}:${lessonId}` -> { playbackId, token, expiresAt }
+
+const setSigner = (newSigner) => {
+  signer = newSigner;
+  cache.clear();
+};
+
+const cacheSet = (key, entry) => {
+  cache.delete(key);
+  cache.set(key, entry);
+  if (cache.size > MAX_CACHE_ENTRIES) {
+    // Map keeps insertion order, so the first key is the oldest
+    cache.delete(cache.keys().next().value);
+  }
+};
+
+// Returns the playback descriptor for one lesson; lessons without a Mux id have nothing to sign
+const issue = (userId, lesson) => {
+  const lessonId = lesson._id.toString();
+  if (!lesson.mux_playback_id) {
+    return { lesson_id: lessonId, video_url: lesson.video_url || null };
+  }
+  if (!signer) {
+    return { lesson_id: lessonId, playback_id: lesson.mux_playback_id };
+  }
+
+  const now = Math.floor(Date.now() / 1000);
+  const key = `${userId}:${lessonId}`;
+  let entry = cache.get(key);
+
+  if (!entry || entry.playbackId !== lesson.mux_playback_id || entry.expiresAt - REFRESH_MARGIN_SECONDS <= now) {
+    const expiresAt = now + TOKEN_TTL_SECONDS;
+    entry = {
+      playbackId: lesson.mux_playback_id,
+      token: signer.sign({ playbackId: lesson.mux_playback_id, userId, expiresAt }),
+      expiresAt
+    };
+    cacheSet(key, entry);
+  }
+
+  return {
+    lesson_id: lessonId,
+    playback_id: entry.playbackId,
+    token: entry.token,
+    expires_at: new Date(entry.expiresAt * 1000).toISOString()
+  };
+};
+
+// Batch issue for a whole course outline: { lessonId: descriptor }
+const issueForLessons = (userId, lessons) => {
+  const tokens = {};
+  lessons.forEach(lesson => {
+    tokens[lesson._id.toString()] = issue(userId, lesson);
+  });
+  return tokens;
+};
+
+const invalidateLesson = (lessonId) => {
+  const suffix = `:${lessonId}`;
+  for (const key of cache.keys()) {
+    if (key.endsWith(suffix)) cache.delete(key);
+  }
+};
+
+module.exports = {
+  issue,
+  issueForLessons,
+  invalidateLesson,
+  setSigner,
+  createLocalSigner,
+  createMuxSigner
+};
@@ -0,0 +1,151 @@
+const fs = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+const Settings = require('../models/Settings');
+const Program = require('../models/Program');
+const FAQ = require('../models/FAQ');
+const Result = require('../models/Result');
+const { findSerialized } = require('./serializers');
+
+// Prerendered index.html with the landing-page data (settings, programs, FAQs, results)
+// inlined as window.__INITIAL_DATA__, so first paint needs no API round trip.
+// The snapshot is cached with an ETag and rebuilt after admin writes.
+// The template is the index.html of the frontend build nginx serves (PRERENDER_TEMPLATE); it is
+// reloaded when the file changes, so a redeploy picks up the new bundle hashes without a restart.
+
+const TEMPLATE_PATH = process.env.PRERENDER_TEMPLATE ||
+  path.join(__dirname, '..', '..', 'frontend', 'build', 'index.html');
+const PUBLIC_INDEX = path.join(__dirname, '..', 'public', 'index.html');
+const TEMPLATE_CHECK_MS = 5000;
+// A built index.html loads the bundle; the CRA source template does not
+const BUNDLE_SCRIPT = /<script[^>]*\bsrc=["'][^"']*\/static\/js\/[^"']+\.js["']/i;
+
+let template = null;   // { html, mtimeMs }
+let templateError = null;
+let checking = null;
+let checkedAt = 0;
+let snapshot = null;   // { html, etag }
+let building = null;
+let version = 0;
+
+const escapeHtml = (text) => String(text || '')
+  .replace(/&/g, '&amp;')
+  .replace(/</g, '&lt;')
+  .replace(/>/g, '&gt;')
+  .replace(/"/g, '&quot;');
+
+// JSON that is safe inside a <script> tag
+const safeJson = (data) => JSON.stringify(data)
+  .replace(/</g, '\\u003c')
+  .replace(/\u2028/g, '\\u2028')
+  .replace(/\u2029/g, '\\u2029');
+
+// Same queries and serialization as the public endpoints
+const loadData = async () => {
+  const [settings, programs, faqs, results] = await Promise.all([
+    Settings.findOne({ type: 'site' }),
+    findSerialized(null, Program.find().sort({ created_at: -1 })),
+    findSerialized(null, FAQ.find().sort({ order: 1 })),
+    findSerialized(null, Result.find().sort({ order: 1 }))
+  ]);
+  return {
+    settings: (settings || new Settings({ type: 'site' })).toJSON(),
+    programs,
+    faqs,
+    results
+  };
+};
+
+const render = (html, data) => {
+  const { settings } = data;
+  const hero = `<main data-prerender="hero"><h1>${escapeHtml(settings.hero_headline)}</h1>` +
+    `<p>${escapeHtml(settings.hero_subheadline)}</p></main>`;
+
+  return html
+    .replace(/<title>[^<]*<\/title>/, `<title>${escapeHtml(settings.site_name)}</title>`)
+    .replace('</head>', `<script>window.__INITIAL_DATA__=${safeJson(data)}</script></head>`)
+    .replace('<div id="root"></div>', `<div id="root">${hero}</div>`);
+};
+
+// Re-reads the template when its mtime changed (checked at most every TEMPLATE_CHECK_MS) and drops
+// the snapshot built from the old one. Rejects while the file is missing or not a built index.html.
+const checkTemplate = async () => {
+  try {
+    const { mtimeMs } = await fs.promises.stat(TEMPLATE_PATH);
+    if (!template || template.mtimeMs !== mtimeMs) {
+      const html = await fs.promises.readFile(TEMPLATE_PATH, 'utf8');
+      if (!BUNDLE_SCRIPT.test(html)) {
+        throw new Error(`${TEMPLATE_PATH} has no bundle <script>, is it a frontend build?`);
+      }
+      template = { html, mtimeMs };
+      version++;
+      snapshot = null;
+    }
+    templateError = null;
+  } catch (error) {
+    template = null;
+    snapshot = null;
+    templateError = error;
+  }
+};
+
+const refreshTemplate = async () => {
+  if (!checking && Date.now() - checkedAt >= TEMPLATE_CHECK_MS) {
+    checkedAt = Date.now();
+    checking = checkTemplate().finally(() => { checking = null; });
+  }
+  if (checking) await checking;
+  if (templateError) throw templateError;
+  return template;
+};
+
+const build = async () => {
+  const buildVersion = version;
+  const { html: templateHtml } = template;
+  const html = render(templateHtml, await loadData());
+  const result = { html, etag: `"${crypto.createHash('sha1').update(html).digest('base64url')}"` };
+  // Only keep the snapshot if nothing changed while it was being built
+  if (buildVersion === version) snapshot = result;
+  return result;
+};
+
+const getSnapshot = async () => {
+  await refreshTemplate();
+  if (snapshot) return snapshot;
+  if (!building) {
+    building = build().finally(() => { building = null; });
+  }
+  return building;
+};
+
+// Called after admin writes to settings, programs, FAQs or results
+const invalidate = () => {
+  version++;
+  snapshot = null;
+  // Rebuild in the background so the next visitor gets a warm snapshot
+  setImmediate(() => getSnapshot().catch(error => console.error('Prerender error:', error.message)));
+};
+
+// Express handler for the SPA fallback
+const send = async (req, res) => {
+  try {
+    const { html, etag } = await getSnapshot();
+    res.set('ETag', etag);
+    res.set('Cache-Control', 'no-cache');
+    if (req.headers['if-none-match'] === etag) {
+      return res.status(304).end();
+    }
+    res.type('html').send(html);
+  } catch (error) {
+    console.error('Prerender error:', error.message);
+    // Plain SPA shell without inlined data
+    res.sendFile(fs.existsSync(TEMPLATE_PATH) ? TEMPLATE_PATH : PUBLIC_INDEX);
+  }
+};
+
+// Startup check, so a missing or unbuilt template shows up in the log before the first visitor
+refreshTemplate()
+  .then(() => console.log(`🖼️ Prerender template: ${TEMPLATE_PATH}`))
+  .catch(error => console.warn(`⚠️ Prerender isključen, šalje se običan index.html: ${error.message}`));
+
+module.exports = { send, invalidate, getSnapshot };
@@ -0,0 +1,121 @@
+const crypto = require('crypto');
+const fs = require('fs');
+const inspector = require('inspector');
+const os = require('os');
+const path = require('path');
+const v8 = require('v8');
+const deadline = require('./deadline');
+
+// On-demand profiling of the live process through the in-process inspector, no --inspect needed.
+//   cpu       CPU profile sampled for N seconds (.cpuprofile, open in Chrome DevTools)
+//   heap      sampling heap profile of allocations over N seconds (.heapprofile)
+//   snapshot  full heap snapshot (.heapsnapshot); blocks the loop while it is written
+// One capture runs at a time; the last MAX_KEPT results stay on disk in PROFILE_DIR.
+
+const PROFILE_DIR = process.env.PROFILE_DIR || path.join(os.tmpdir(), 'continental-profiles');
+const MAX_SECONDS = 120;
+const MAX_KEPT = 10;
+
+const TYPES = {
+  cpu: '.cpuprofile',
+  heap: '.heapprofile',
+  snapshot: '.heapsnapshot'
+};
+
+const profiles = new Map(); // id -> metadata (insertion order = age)
+const files = new Map(); // id -> path on disk
+let active = null;
+
+const post = (session, method, params) => new Promise((resolve, reject) => {
+  session.post(method, params, (error, result) => (error ? reject(error) : resolve(result)));
+});
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+const captureCpu = async (session, seconds, file) => {
+  await post(session, 'Profiler.enable');
+  await post(session, 'Profiler.start');
+  await sleep(seconds * 1000);
+  const { profile } = await post(session, 'Profiler.stop');
+  await fs.promises.writeFile(file, JSON.stringify(profile));
+};
+
+const captureHeap = async (session, seconds, file) => {
+  await post(session, 'HeapProfiler.enable');
+  await post(session, 'HeapProfiler.startSampling');
+  await sleep(seconds * 1000);
+  const { profile } = await post(session, 'HeapProfiler.stopSampling');
+  await fs.promises.writeFile(file, JSON.stringify(profile));
+};
+
+const prune = async () => {
+  while (profiles.size > MAX_KEPT) {
+    const [oldest] = profiles.keys();
+    profiles.delete(oldest);
+    const file = files.get(oldest);
+    files.delete(oldest);
+    if (file) await fs.promises.rm(file, { force: true });
+  }
+};
+
+const capture = async (profile, file) => {
+  const session = new inspector.Session();
+  session.connect();
+  try {
+    await fs.promises.mkdir(PROFILE_DIR, { recursive: true });
+    if (profile.type === 'cpu') {
+      await captureCpu(session, profile.seconds, file);
+    } else if (profile.type === 'heap') {
+      await captureHeap(session, profile.seconds, file);
+    } else {
+      v8.writeHeapSnapshot(file);
+    }
+    profile.status = 'done';
+    profile.size = (await fs.promises.stat(file)).size;
+  } catch (error) {
+    console.error('Profiler error:', error.message);
+    profile.status = 'failed';
+    profile.error = error.message;
+    await fs.promises.rm(file, { force: true });
+  } finally {
+    session.disconnect();
+    profile.finished_at = new Date().toISOString();
+    active = null;
+    await prune().catch(error => console.error('Profiler cleanup error:', error.message));
+  }
+};
+
+// Starts a capture in the background; returns its metadata, or null if one is already running
+const start = (type, seconds) => {
+  if (active) return null;
+
+  const id = crypto.randomBytes(8).toString('hex');
+  const profile = {
+    id,
+    type,
+    seconds: type === 'snapshot' ? 0 : Math.min(Math.max(seconds, 1), MAX_SECONDS),
+    status: 'running',
+    filename: `${type}-${id}${TYPES[type]}`,
+    size: null,
+    error: null,
+    started_at: new Date().toISOString(),
+    finished_at: null
+  };
+  const file = path.join(PROFILE_DIR, profile.filename);
+  profiles.set(id, profile);
+  files.set(id, file);
+  active = profile;
+
+  // Outside the request budget: the capture outlives the request that started it
+  deadline.detached(() => capture(profile, file));
+  return profile;
+};
+
+module.exports = {
+  TYPES,
+  MAX_SECONDS,
+  start,
+  get: (id) => profiles.get(id),
+  list: () => [...profiles.values()].reverse(),
+  fileFor: (id) => (profiles.get(id)?.status === 'done' ? files.get(id) : null)
+};
@@ -0,0 +1,190 @@
+const Program = require('../models/Program');
+const Course = require('../models/Course');
+const Lesson = require('../models/Lesson');
+const ShopProduct = require('../models/ShopProduct');
+
+// In-process inverted index over programs, courses, lessons and shop products.
+// Built once on startup, then kept in sync by admin writes (upsert/remove), so
+// /api/search never scans the catalog.
+
+const TITLE_WEIGHT = 3;
+const BODY_WEIGHT = 1;
+
+const documents = new Map();  // `${type}:${id}` -> { type, id, category, course_id, length, terms: Map, item }
+const postings = new Map();   // term -> Set(docKey)
+
+// Lowercase and strip diacritics (č, ć -> c, š -> s, ž -> z, đ -> d) so "sminka" finds "šminka"
+const normalize = (text) => String(text || '')
+  .toLowerCase()
+  .replace(/đ/g, 'd')
+  .normalize('NFD')
+  .replace(/[\u0300-\u036f]/g, '');
+
+const tokenize = (text) => normalize(text).split(/[^a-z0-9]+/).filter(t => t.length > 1);
+
+// Which fields are indexed and returned for each type; null keeps the document out of the index
+const extractors = {
+  program: (d) => ({
+    title: d.name,
+    body: [d.description, ...(d.features || [])].join(' '),
+    item: { name: d.name, description: d.description, price: d.price, currency: d.currency, thumbnail_url: d.thumbnail_url }
+  }),
+  course: (d) => ({
+    title: d.title,
+    body: d.description,
+    item: { title: d.title, description: d.description, program_id: d.program_id, thumbnail_url: d.thumbnail_url }
+  }),
+  // /api/search is public, so only free lessons are searchable
+  lesson: (d) => (!d.is_free ? null : {
+    title: d.title,
+    body: d.description,
+    course_id: d.course_id,
+    item: { title: d.title, description: d.description, course_id: d.course_id, is_free: d.is_free }
+  }),
+  product: (d) => ({
+    title: d.title,
+    body: [d.description, d.category].join(' '),
+    category: d.category,
+    item: {
+      title: d.title,
+      description: d.description,
+      category: d.category,
+      price: d.price,
+      currency: d.currency,
+      image_url: d.image_url,
+      is_available: d.is_available
+    }
+  })
+};
+
+const remove = (type, id) => {
+  const key = `${type}:${id}`;
+  const doc = documents.get(key);
+  if (!doc) return;
+  doc.terms.forEach((_, term) => {
+    const set = postings.get(term);
+    if (!set) return;
+    set.delete(key);
+    if (set.size === 0) postings.delete(term);
+  });
+  documents.delete(key);
+};
+
+const upsert = (type, source) => {
+  const id = (source._id || source.id).toString();
+  remove(type, id);
+
+  const fields = extractors[type](source);
+  if (!fields) return;
+  const terms = new Map();
+  const add = (tokens, weight) => tokens.forEach(t => terms.set(t, (terms.get(t) || 0) + weight));
+  const titleTokens = tokenize(fields.title);
+  const bodyTokens = tokenize(fields.body);
+  add(titleTokens, TITLE_WEIGHT);
+  add(bodyTokens, BODY_WEIGHT);
+
+  const key = `${type}:${id}`;
+  documents.set(key, {
+    type,
+    id,
+    category: fields.category ? normalize(fields.category) : null,
+    course_id: fields.course_id || null,
+    length: titleTokens.length + bodyTokens.length,
+    terms,
+    item: { id, ...fields.item }
+  });
+  terms.forEach((_, term) => {
+    if (!postings.has(term)) postings.set(term, new Set());
+    postings.get(term).add(key);
+  });
+};
+
+// Lessons are removed together with their course
+const removeLessonsOfCourse = (courseId) => {
+  for (const doc of [...documents.values()]) {
+    if (doc.type === 'lesson' && doc.course_id === courseId) remove('lesson', doc.id);
+  }
+};
+
+// The last query term also matches as a prefix, so results show up while typing
+const matchingTerms = (term, isLast) => {
+  if (!isLast) return postings.has(term) ? [term] : [];
+  const terms = [];
+  for (const candidate of postings.keys()) {
+    if (candidate.startsWith(term)) terms.push(candidate);
+  }
+  return terms;
+};
+
+const search = ({ q, types, category, page = 1, limit = 20 }) => {
+  const queryTerms = [...new Set(tokenize(q))];
+  if (queryTerms.length === 0) return { total: 0, page, limit, results: [] };
+
+  const totalDocs = documents.size || 1;
+  let scores = null;
+
+  queryTerms.forEach((term, index) => {
+    const termScores = new Map();
+    matchingTerms(term, index === queryTerms.length - 1).forEach(matched => {
+      const keys = postings.get(matched);
+      const idf = Math.log(1 + totalDocs / keys.size);
+      keys.forEach(key => {
+        const doc = documents.get(key);
+        const tf = doc.terms.get(matched) / Math.sqrt(doc.length || 1);
+        termScores.set(key, Math.max(termScores.get(key) || 0, tf * idf));
+      });
+    });
+
+    // Every query term has to match (AND)
+    if (scores === null) {
+      scores = termScores;
+    } else {
+      const next = new Map();
+      scores.forEach((score, key) => {
+        if (termScores.has(key)) next.set(key, score + termScores.get(key));
+      });
+      scores = next;
+    }
+  });
+
+  const wantedCategory = category ? normalize(category) : null;
+  const ranked = [];
+  scores.forEach((score, key) => {
+    const doc = documents.get(key);
+    if (types && !types.includes(doc.type)) return;
+    if (wantedCategory && doc.category !== wantedCategory) return;
+    ranked.push({ type: doc.type, score: Math.round(score * 1000) / 1000, item: doc.item });
+  });
+  ranked.sort((a, b) => b.score - a.score);
+
+  const start = (page - 1) * limit;
+  return { total: ranked.length, page, limit, results: ranked.slice(start, start + limit) };
+};
+
+const load = async () => {
+  documents.clear();
+  postings.clear();
+
+  const [programs, courses, lessons, products] = await Promise.all([
+    Program.find().lean(),
+    Course.find().lean(),
+    Lesson.find({ is_free: true }, { video_url: 0, mux_playback_id: 0 }).lean(),
+    ShopProduct.find().lean()
+  ]);
+  programs.forEach(d => upsert('program', d));
+  courses.forEach(d => upsert('course', d));
+  lessons.forEach(d => upsert('lesson', d));
+  products.forEach(d => upsert('product', d));
+
+  console.log(`🔎 Pretraga: ${documents.size} stavki indeksirano`);
+};
+
+module.exports = {
+  TYPES: Object.keys(extractors),
+  load,
+  upsert,
+  remove,
+  removeLessonsOfCourse,
+  search,
+  normalize
+};
@@ -0,0 +1,119 @@
+const mongoose = require('mongoose');
+
+// Fast serializers for .lean() query results.
+// Each model's plan (hidden fields, defaults for missing paths, virtuals) is compiled once
+// from its schema and toJSON, so list endpoints skip document hydration and toObject() entirely.
+// Output matches the models' toJSON byte for byte: stored fields in stored order with
+// empty objects minimized, then defaults, then virtuals, then `id`.
+
+const ALWAYS_OMIT = ['_id', '__v'];
+
+// `X-Serializer: legacy` switches to hydrate + toJSON; only honoured when the contract tests ask for it
+const LEGACY_HEADER_ENABLED = process.env.SERIALIZER_CONTRACT_TESTS === '1';
+
+// Sample values for the probe document below, by schema type
+const SAMPLES = {
+  String: () => 'probe',
+  Number: () => 1,
+  Boolean: () => true,
+  Date: () => new Date(0),
+  Mixed: () => ({ probe: true }),
+  ObjectId: () => new mongoose.Types.ObjectId()
+};
+
+const isPlainObject = (value) => value !== null && typeof value === 'object' &&
+  Object.getPrototypeOf(value) === Object.prototype;
+
+// Same as mongoose's `minimize`: drop keys holding undefined or empty objects
+const minimize = (value) => {
+  if (!isPlainObject(value)) return value;
+  const out = {};
+  let empty = true;
+  for (const key in value) {
+    const minimized = minimize(value[key]);
+    if (minimized !== undefined) {
+      out[key] = minimized;
+      empty = false;
+    }
+  }
+  return empty ? undefined : out;
+};
+
+// Runs the model's own toJSON on a document with every path filled in and reports which
+// top-level fields it drops and whether it adds `id`, so the plan follows toJSON edits
+const probeToJSON = (Model) => {
+  const probe = new Model();
+  Model.schema.eachPath((pathName, schemaType) => {
+    const sample = SAMPLES[schemaType.instance];
+    if (pathName !== '_id' && sample && probe.get(pathName) == null) probe.set(pathName, sample());
+  });
+  const json = probe.toJSON();
+  return {
+    hidden: Object.keys(probe.toObject()).filter(key => !(key in json)),
+    emitId: 'id' in json
+  };
+};
+
+const compile = (Model) => {
+  const schema = Model.schema;
+  const { hidden, emitId } = probeToJSON(Model);
+  const omit = new Set([...ALWAYS_OMIT, ...hidden]);
+
+  // Top-level paths with a default (arrays default to []), applied when missing from the stored doc
+  const defaults = [];
+  schema.eachPath((pathName, schemaType) => {
+    if (pathName.includes('.') || omit.has(pathName)) return;
+    if (schemaType.$isMongooseArray) {
+      defaults.push([pathName, () => []]);
+    } else if (schemaType.defaultValue !== undefined) {
+      // getDefault() casts like a hydrated document would (Date.now -> Date, serialized as ISO)
+      defaults.push([pathName, () => schemaType.getDefault(undefined, false)]);
+    }
+  });
+
+  // Course exposes virtuals in toJSON; `id` is always emitted last below
+  const virtuals = Object.keys(schema.virtuals)
+    .filter(name => name !== 'id' && !omit.has(name))
+    .map(name => [name, schema.virtuals[name]]);
+
+  return (doc) => {
+    const out = {};
+    for (const key in doc) {
+      if (omit.has(key)) continue;
+      const value = minimize(doc[key]);
+      if (value !== undefined) out[key] = value;
+    }
+    for (let i = 0; i < defaults.length; i++) {
+      const [pathName, getDefault] = defaults[i];
+      if (!(pathName in doc)) out[pathName] = getDefault();
+    }
+    for (let i = 0; i < virtuals.length; i++) {
+      out[virtuals[i][0]] = virtuals[i][1].applyGetters(undefined, doc);
+    }
+    if (emitId) out.id = doc._id.toString();
+    return out;
+  };
+};
+
+const compiled = new Map();
+
+const serializerFor = (Model) => {
+  if (!compiled.has(Model.modelName)) compiled.set(Model.modelName, compile(Model));
+  return compiled.get(Model.modelName);
+};
+
+const serialize = (Model, docs) => docs.map(serializerFor(Model));
+
+// Runs a find() query and returns toJSON-compatible plain objects.
+// With SERIALIZER_CONTRACT_TESTS=1, `X-Serializer: legacy` keeps the hydrate + toJSON path and
+// is echoed back, so the contract tests can tell the comparison really ran.
+const findSerialized = async (req, query) => {
+  if (LEGACY_HEADER_ENABLED && req && req.get('X-Serializer') === 'legacy') {
+    const docs = await query;
+    req.res.set('X-Serializer', 'legacy');
+    return docs.map(doc => doc.toJSON());
+  }
+  return serialize(query.model, await query.lean());
+};
+
+module.exports = { serializerFor, serialize, findSerialized };
@@ -1,8 +1,12 @@
-import requests
+import argparse
+import asyncio
 import sys
 import json
+import threading
 from datetime import datetime
 
+from continental_client import ContinentalClient
+
 class ContinentalAcademyAPITester:
     def __init__(self, base_url="https://edu-platform-153.preview.emergentagent.com"):
         self.base_url = base_url
@@ -11,11 +15,14 @@ class ContinentalAcademyAPITester:
         self.tests_run = 0
         self.tests_passed = 0
         self.failed_tests = []
+        # Pooled keep-alive client; retries off so each check reports the status the backend sent
+        self.loop = asyncio.new_event_loop()
+        self.client = ContinentalClient(base_url, retries=0)
 
     def run_test(self, name, method, endpoint, expected_status, data=None, headers=None, use_admin=False):
         """Run a single API test"""
         url = f"{self.base_url}/api/{endpoint}"
-        test_headers = {'Content-Type': 'application/json'}
+        test_headers = {}
         
         # Add auth token if available
         token_to_use = self.admin_token if use_admin and self.admin_token else self.token
@@ -30,14 +37,10 @@ class ContinentalAcademyAPITester:
         print(f"   URL: {url}")
         
         try:
-            if method == 'GET':
-                response = requests.get(url, headers=test_headers, timeout=10)
-            elif method == 'POST':
-                response = requests.post(url, json=data, headers=test_headers, timeout=10)
-            elif method == 'PUT':
-                response = requests.put(url, json=data, headers=test_headers, timeout=10)
-            elif method == 'DELETE':
-                response = requests.delete(url, headers=test_headers, timeout=10)
+            response = self.loop.run_until_complete(self.client.request(
+                method, f"/{endpoint}", auth=False, headers=test_headers,
+                json=data if method in ('POST', 'PUT') else None
+            ))
 
             success = response.status_code == expected_status
             if success:
@@ -405,11 +408,70 @@ class ContinentalAcademyAPITester:
         else:
             print("\n🎉 All tests passed!")
         
+        self.loop.run_until_complete(self.client.aclose())
         return self.tests_passed == self.tests_run
 
+def start_profile_capture(args):
+    """Capture a server profile in a background thread while the tests or a replay run"""
+    result = {}
+
+    async def capture():
+        async with ContinentalClient(args.base_url, email=args.admin_email, password=args.admin_password) as client:
+            return await client.admin.capture_profile(args.profile, args.profile_seconds, args.profile_dir)
+
+    def run():
+        try:
+            result["path"] = asyncio.run(capture())
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, result
+
+def finish_profile_capture(capture):
+    thread, result = capture
+    thread.join()
+    if "error" in result:
+        print(f"❌ Profile capture failed: {result['error']}")
+    else:
+        print(f"🔬 Profile saved: {result['path']}")
+
 def main():
-    tester = ContinentalAcademyAPITester()
+    parser = argparse.ArgumentParser(description="Continental Academy API tests and traffic replay")
+    parser.add_argument("--base-url", default="https://edu-platform-153.preview.emergentagent.com")
+    parser.add_argument("--replay-nginx", metavar="ACCESS_LOG", help="replay /api requests from an nginx access log")
+    parser.add_argument("--replay-har", metavar="HAR_FILE", help="replay /api requests from a HAR recording")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="timing multiplier (2 = twice as fast, 0 = no delays)")
+    parser.add_argument("--seed-users", type=int, default=5, help="seeded users that replace recorded clients (shared round robin when there are more clients)")
+    parser.add_argument("--include-writes", action="store_true",
+                        help="also replay admin/content writes from HAR recordings")
+    parser.add_argument("--profile", choices=["cpu", "heap", "snapshot"],
+                        help="capture a server profile while the run is in progress (admin only)")
+    parser.add_argument("--profile-seconds", type=int, default=10)
+    parser.add_argument("--profile-dir", default=".", help="where downloaded profiles are written")
+    parser.add_argument("--admin-email", default="admin@test.com")
+    parser.add_argument("--admin-password", default="admin123")
+    args = parser.parse_args()
+
+    capture = start_profile_capture(args) if args.profile else None
+
+    if args.replay_nginx or args.replay_har:
+        from traffic_replay import TrafficReplayer, parse_har, parse_nginx_log
+        recorded = parse_nginx_log(args.replay_nginx) if args.replay_nginx else parse_har(args.replay_har)
+        replayer = TrafficReplayer(args.base_url, seed_users=args.seed_users, speed=args.speed,
+                                   include_writes=args.include_writes)
+        replayer.replay(recorded)
+        summary = replayer.report()
+        if capture:
+            finish_profile_capture(capture)
+        return 0 if summary and summary["errors"] == 0 else 1
+
+    tester = ContinentalAcademyAPITester(args.base_url)
     success = tester.run_all_tests()
+    if capture:
+        finish_profile_capture(capture)
     return 0 if success else 1
 
 if __name__ == "__main__":
@@ -0,0 +1,13 @@
+"""Async httpx client for the Continental Academy API"""
+from .client import AdminAPI, APIError, ContinentalClient, PaymentsAPI
+from .models import (
+    FAQ, Analytics, AuthResponse, CheckoutSession, Course, Lesson, PaymentStatus, PlaybackToken,
+    Profile, Program, Result, SearchHit, SearchResults, Settings, ShopProduct, Upload, User,
+)
+
+__all__ = [
+    "ContinentalClient", "AdminAPI", "PaymentsAPI", "APIError",
+    "User", "AuthResponse", "Program", "Course", "Lesson", "PlaybackToken", "ShopProduct",
+    "FAQ", "Result", "Settings", "CheckoutSession", "PaymentStatus", "SearchHit", "SearchResults",
+    "Upload", "Analytics", "Profile",
+]
@@ -0,0 +1,418 @@
+"""
+Async client for the Continental Academy API.
+
+    async with ContinentalClient("http://localhost:8001", email="admin@test.com", password="...") as client:
+        programs = await client.programs()
+        await client.admin.bulk(client.admin.add_user_course, [(user_id, course_id), ...], concurrency=10)
+"""
+import asyncio
+import base64
+import json
+import random
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+import httpx
+
+from .models import (
+    FAQ, Analytics, AuthResponse, CheckoutSession, Course, Lesson, PaymentStatus, PlaybackToken,
+    Profile, Program, Result, SearchResults, Settings, ShopProduct, Upload, User,
+)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+# Failures where the request never reached the server, so even a POST is safe to resend
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+TOKEN_REFRESH_MARGIN = 60  # seconds before JWT expiry
+
+
+class APIError(Exception):
+    """Non-2xx response; `detail` is the backend's error message"""
+
+    def __init__(self, response: httpx.Response):
+        self.response = response
+        self.status_code = response.status_code
+        try:
+            body = response.json()
+            self.detail = body.get("detail") or body.get("message") if isinstance(body, dict) else body
+        except ValueError:
+            self.detail = response.text[:200]
+        super().__init__(f"{response.request.method} {response.request.url.path} -> {self.status_code}: {self.detail}")
+
+
+def _token_expiry(token: str) -> Optional[float]:
+    """Read `exp` from a JWT without verifying it"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+    except (IndexError, ValueError):
+        return None
+
+
+class ContinentalClient:
+    def __init__(self, base_url: str, *, email: Optional[str] = None, password: Optional[str] = None,
+                 token: Optional[str] = None, max_connections: int = 20, timeout: float = 10.0,
+                 retries: int = 3, backoff: float = 0.2, max_backoff: float = 5.0):
+        self.email = email
+        self.password = password
+        self.token = token
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Created on first use: before Python 3.10 a lock binds to the loop current at construction
+        self._login_lock: Optional[asyncio.Lock] = None
+        # HTTP/1.1 keep-alive pool shared by every call on this client
+        self._http = httpx.AsyncClient(
+            base_url=f"{base_url.rstrip('/')}/api",
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections,
+                                keepalive_expiry=30),
+            http1=True,
+            http2=False,
+        )
+        self.admin = AdminAPI(self)
+        self.payments = PaymentsAPI(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    # ---------- transport ----------
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return float(response.headers["Retry-After"])
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def _ensure_token(self, rejected: Optional[str] = None):
+        """Log in if the token is missing or about to expire, or if `rejected` (a token the
+        server answered 401 to) is still the current one"""
+        if not (self.email and self.password):
+            return
+        stale = rejected if rejected is not None else self.token
+        expiry = _token_expiry(stale) if stale else None
+        if rejected is None and self.token and (expiry is None or expiry - time.time() > TOKEN_REFRESH_MARGIN):
+            return
+        if self._login_lock is None:
+            self._login_lock = asyncio.Lock()
+        async with self._login_lock:
+            # Another task may have logged in while we waited
+            if self.token and self.token != stale:
+                return
+            await self.login(self.email, self.password)
+
+    async def request(self, method: str, path: str, *, auth: bool = True, retry: bool = True,
+                      **kwargs: Any) -> httpx.Response:
+        """Send a request and return the raw response (no status check).
+        Retries 429 and connect failures for every method, 5xx and other transport errors only
+        for idempotent ones, and logs in again once on 401 when credentials are known."""
+        method = method.upper()
+        headers = dict(kwargs.pop("headers", None) or {})
+        explicit_auth = any(k.lower() == "authorization" for k in headers)
+        refreshed = False
+        attempt = 0
+
+        if auth and not explicit_auth:
+            await self._ensure_token()
+
+        while True:
+            sent_token = None
+            if auth and not explicit_auth and self.token:
+                sent_token = self.token
+                headers["Authorization"] = f"Bearer {sent_token}"
+            response = None
+            try:
+                response = await self._http.request(method, path, headers=headers, **kwargs)
+            except httpx.TransportError as error:
+                # A read error or timeout after sending may mean a POST was already applied
+                safe = method in IDEMPOTENT_METHODS or isinstance(error, NOT_SENT_ERRORS)
+                if not retry or not safe or attempt >= self.retries:
+                    raise
+            else:
+                if response.status_code == 401 and auth and not explicit_auth and not refreshed \
+                        and self.email and self.password:
+                    refreshed = True
+                    await self._ensure_token(rejected=sent_token or "")
+                    continue
+                retryable = response.status_code == 429 or (
+                    response.status_code >= 500 and method in IDEMPOTENT_METHODS)
+                if not retry or not retryable or attempt >= self.retries:
+                    return response
+            await asyncio.sleep(self._retry_delay(attempt, response))
+            attempt += 1
+
+    async def call(self, method: str, path: str, **kwargs: Any) -> Any:
+        """Send a request and return the JSON body, raising APIError on non-2xx"""
+        response = await self.request(method, path, **kwargs)
+        if response.status_code >= 400:
+            raise APIError(response)
+        return response.json() if response.content else None
+
+    async def download(self, path: str, dest: Path) -> Path:
+        """Stream a GET response body to `dest` without holding it in memory"""
+        await self._ensure_token()
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        async with self._http.stream("GET", path, headers=headers) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise APIError(response)
+            with open(dest, "wb") as out:
+                async for chunk in response.aiter_bytes():
+                    out.write(chunk)
+        return dest
+
+    # ---------- bulk helpers ----------
+
+    async def gather_bounded(self, calls: Iterable[Callable[[], Awaitable[Any]]], concurrency: int = 10,
+                             return_exceptions: bool = False) -> List[Any]:
+        """Run zero-argument coroutine factories with at most `concurrency` in flight"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(call):
+            async with semaphore:
+                return await call()
+
+        return await asyncio.gather(*(run(call) for call in calls), return_exceptions=return_exceptions)
+
+    # ---------- auth ----------
+
+    async def login(self, email: str, password: str) -> AuthResponse:
+        data = await self.call("POST", "/auth/login", auth=False, json={"email": email, "password": password})
+        self.token = data["access_token"]
+        self.email, self.password = email, password
+        return AuthResponse.from_dict(data)
+
+    async def register(self, name: str, email: str, password: str) -> AuthResponse:
+        data = await self.call("POST", "/auth/register", auth=False,
+                               json={"name": name, "email": email, "password": password})
+        self.token = data["access_token"]
+        self.email, self.password = email, password
+        return AuthResponse.from_dict(data)
+
+    async def me(self) -> User:
+        return User.from_dict(await self.call("GET", "/auth/me"))
+
+    # ---------- public ----------
+
+    async def programs(self) -> List[Program]:
+        return Program.from_list(await self.call("GET", "/programs", auth=False))
+
+    async def courses(self, program_id: Optional[str] = None) -> List[Course]:
+        params = {"program_id": program_id} if program_id else None
+        return Course.from_list(await self.call("GET", "/courses", auth=False, params=params))
+
+    async def course(self, course_id: str) -> Course:
+        return Course.from_dict(await self.call("GET", f"/courses/{course_id}"))
+
+    async def lessons(self, course_id: str) -> List[Lesson]:
+        return Lesson.from_list(await self.call("GET", f"/lessons/{course_id}"))
+
+    async def lesson(self, lesson_id: str) -> Lesson:
+        return Lesson.from_dict(await self.call("GET", f"/lesson/{lesson_id}"))
+
+    async def lesson_playback(self, lesson_id: str) -> PlaybackToken:
+        return PlaybackToken.from_dict(await self.call("GET", f"/lesson/{lesson_id}/playback"))
+
+    async def course_playback(self, course_id: str) -> dict:
+        data = await self.call("GET", f"/courses/{course_id}/playback")
+        return {lesson_id: PlaybackToken.from_dict(token) for lesson_id, token in data.items()}
+
+    async def shop_products(self, category: Optional[str] = None) -> List[ShopProduct]:
+        params = {"category": category} if category else None
+        return ShopProduct.from_list(await self.call("GET", "/shop/products", auth=False, params=params))
+
+    async def settings(self) -> Settings:
+        return Settings.from_dict(await self.call("GET", "/settings", auth=False))
+
+    async def faqs(self) -> List[FAQ]:
+        return FAQ.from_list(await self.call("GET", "/faqs", auth=False))
+
+    async def results(self) -> List[Result]:
+        return Result.from_list(await self.call("GET", "/results", auth=False))
+
+    async def search(self, q: str, *, type: Optional[str] = None, category: Optional[str] = None,
+                     page: int = 1, limit: int = 20) -> SearchResults:
+        params = {"q": q, "page": page, "limit": limit}
+        if type:
+            params["type"] = type
+        if category:
+            params["category"] = category
+        return SearchResults.from_dict(await self.call("GET", "/search", auth=False, params=params))
+
+    async def track_event(self, event_type: str, page: Optional[str] = None, **data: Any) -> dict:
+        return await self.call("POST", "/analytics/event", auth=False,
+                               json={"event_type": event_type, "page": page, **data})
+
+
+class AdminAPI:
+    """/api/admin routes; the client must be logged in as an admin"""
+
+    def __init__(self, client: ContinentalClient):
+        self.client = client
+
+    async def bulk(self, operation: Callable[..., Awaitable[Any]], items: Iterable[Any],
+                   concurrency: int = 10, return_exceptions: bool = True) -> List[Any]:
+        """Apply an admin operation to many items concurrently, e.g.
+        await client.admin.bulk(client.admin.add_user_course, [(user_id, course_id), ...])"""
+        calls = [(lambda args=item: operation(*args) if isinstance(args, tuple) else operation(args))
+                 for item in items]
+        return await self.client.gather_bounded(calls, concurrency, return_exceptions)
+
+    # users
+    async def users(self) -> List[User]:
+        return User.from_list(await self.client.call("GET", "/admin/users"))
+
+    async def set_user_role(self, user_id: str, role: str) -> User:
+        return User.from_dict(await self.client.call("PUT", f"/admin/users/{user_id}/role", params={"role": role}))
+
+    async def user_courses(self, user_id: str) -> List[str]:
+        return await self.client.call("GET", f"/admin/users/{user_id}/courses")
+
+    async def set_user_courses(self, user_id: str, course_ids: List[str]) -> List[str]:
+        return await self.client.call("PUT", f"/admin/users/{user_id}/courses", json=course_ids)
+
+    async def add_user_course(self, user_id: str, course_id: str) -> dict:
+        return await self.client.call("POST", f"/admin/users/{user_id}/courses/add", params={"course_id": course_id})
+
+    async def remove_user_course(self, user_id: str, course_id: str) -> dict:
+        return await self.client.call("POST", f"/admin/users/{user_id}/courses/remove",
+                                      params={"course_id": course_id})
+
+    async def set_user_subscriptions(self, user_id: str, program_ids: List[str]) -> List[str]:
+        return await self.client.call("PUT", f"/admin/users/{user_id}/subscriptions", json=program_ids)
+
+    # programs
+    async def programs(self) -> List[Program]:
+        return Program.from_list(await self.client.call("GET", "/admin/programs"))
+
+    async def create_program(self, **data: Any) -> Program:
+        return Program.from_dict(await self.client.call("POST", "/admin/programs", json=data))
+
+    async def update_program(self, program_id: str, **data: Any) -> Program:
+        return Program.from_dict(await self.client.call("PUT", f"/admin/programs/{program_id}", json=data))
+
+    async def delete_program(self, program_id: str) -> dict:
+        return await self.client.call("DELETE", f"/admin/programs/{program_id}")
+
+    # courses and lessons
+    async def courses(self) -> List[Course]:
+        return Course.from_list(await self.client.call("GET", "/admin/courses"))
+
+    async def create_course(self, **data: Any) -> Course:
+        return Course.from_dict(await self.client.call("POST", "/admin/courses", json=data))
+
+    async def update_course(self, course_id: str, **data: Any) -> Course:
+        return Course.from_dict(await self.client.call("PUT", f"/admin/courses/{course_id}", json=data))
+
+    async def delete_course(self, course_id: str) -> dict:
+        return await self.client.call("DELETE", f"/admin/courses/{course_id}")
+
+    async def create_lesson(self, **data: Any) -> Lesson:
+        return Lesson.from_dict(await self.client.call("POST", "/admin/lessons", json=data))
+
+    async def update_lesson(self, lesson_id: str, **data: Any) -> Lesson:
+        return Lesson.from_dict(await self.client.call("PUT", f"/admin/lessons/{lesson_id}", json=data))
+
+    async def delete_lesson(self, lesson_id: str) -> dict:
+        return await self.client.call("DELETE", f"/admin/lessons/{lesson_id}")
+
+    async def reorder_lessons(self, orders: List[dict]) -> dict:
+        return await self.client.call("PUT", "/admin/lessons/reorder", json=orders)
+
+    # shop
+    async def shop_products(self) -> List[ShopProduct]:
+        return ShopProduct.from_list(await self.client.call("GET", "/admin/shop/products"))
+
+    async def create_product(self, **data: Any) -> ShopProduct:
+        return ShopProduct.from_dict(await self.client.call("POST", "/admin/shop/products", json=data))
+
+    async def update_product(self, product_id: str, **data: Any) -> ShopProduct:
+        return ShopProduct.from_dict(await self.client.call("PUT", f"/admin/shop/products/{product_id}", json=data))
+
+    async def delete_product(self, product_id: str) -> dict:
+        return await self.client.call("DELETE", f"/admin/shop/products/{product_id}")
+
+    # content
+    async def create_faq(self, **data: Any) -> FAQ:
+        return FAQ.from_dict(await self.client.call("POST", "/admin/faqs", json=data))
+
+    async def update_faq(self, faq_id: str, **data: Any) -> FAQ:
+        return FAQ.from_dict(await self.client.call("PUT", f"/admin/faqs/{faq_id}", json=data))
+
+    async def delete_faq(self, faq_id: str) -> dict:
+        return await self.client.call("DELETE", f"/admin/faqs/{faq_id}")
+
+    async def create_result(self, **data: Any) -> Result:
+        return Result.from_dict(await self.client.call("POST", "/admin/results", json=data))
+
+    async def delete_result(self, result_id: str) -> dict:
+        return await self.client.call("DELETE", f"/admin/results/{result_id}")
+
+    async def update_settings(self, **data: Any) -> Settings:
+        return Settings.from_dict(await self.client.call("PUT", "/admin/settings", json=data))
+
+    async def upload(self, filename: str, content: bytes, content_type: str) -> Upload:
+        return Upload.from_dict(await self.client.call("POST", "/uploads",
+                                                       files={"file": (filename, content, content_type)}))
+
+    # analytics
+    async def analytics(self) -> Analytics:
+        return Analytics.from_dict(await self.client.call("GET", "/admin/analytics"))
+
+    async def seed(self) -> dict:
+        return await self.client.call("POST", "/admin/seed")
+
+    # profiling
+    async def loop_stats(self) -> dict:
+        """Event-loop delay percentiles and recent requests that held the loop"""
+        return await self.client.call("GET", "/admin/profiling/loop")
+
+    async def start_profile(self, type: str = "cpu", seconds: int = 10) -> Profile:
+        return Profile.from_dict(await self.client.call(
+            "POST", "/admin/profiling/profiles", json={"type": type, "seconds": seconds}))
+
+    async def profiles(self) -> List[Profile]:
+        return Profile.from_list(await self.client.call("GET", "/admin/profiling/profiles"))
+
+    async def profile(self, profile_id: str) -> Profile:
+        return Profile.from_dict(await self.client.call("GET", f"/admin/profiling/profiles/{profile_id}"))
+
+    async def download_profile(self, profile_id: str, dest: Path) -> Path:
+        return await self.client.download(f"/admin/profiling/profiles/{profile_id}/download", Path(dest))
+
+    async def capture_profile(self, type: str = "cpu", seconds: int = 10, dest: Path = Path("."),
+                              poll: float = 0.5) -> Path:
+        """Start a capture, wait for it and download it; `dest` may be a directory or a file path.
+        Run it alongside a load test to profile the server under that load."""
+        profile = await self.start_profile(type, seconds)
+        while profile.status == "running":
+            await asyncio.sleep(poll)
+            profile = await self.profile(profile.id)
+        if profile.status != "done":
+            raise RuntimeError(f"Profile {profile.id} {profile.status}: {profile.error}")
+        dest = Path(dest)
+        return await self.download_profile(profile.id, dest / profile.filename if dest.is_dir() else dest)
+
+
+class PaymentsAPI:
+    def __init__(self, client: ContinentalClient):
+        self.client = client
+
+    async def checkout_subscription(self, program_id: str, origin_url: str) -> CheckoutSession:
+        return CheckoutSession.from_dict(await self.client.call(
+            "POST", "/payments/checkout/subscription", params={"program_id": program_id, "origin_url": origin_url}))
+
+    async def checkout_product(self, product_id: str, origin_url: str) -> CheckoutSession:
+        return CheckoutSession.from_dict(await self.client.call(
+            "POST", "/payments/checkout/product", params={"product_id": product_id, "origin_url": origin_url}))
+
+    async def status(self, session_id: str) -> PaymentStatus:
+        return PaymentStatus.from_dict(await self.client.call("GET", f"/payments/status/{session_id}"))
@@ -0,0 +1,234 @@
+"""
+Typed response models for the Continental Academy API.
+Each model keeps the full JSON in `raw`, so fields added by the backend are never lost.
+"""
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional
+
+
+class Model:
+    """Build a dataclass from API JSON, ignoring keys it does not declare"""
+
+    raw: Dict[str, Any]
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {f.name for f in fields(cls)} - {"raw"}
+        return cls(**{k: v for k, v in data.items() if k in known}, raw=data)
+
+    @classmethod
+    def from_list(cls, items):
+        return [cls.from_dict(item) for item in items]
+
+
+@dataclass
+class User(Model):
+    id: str
+    name: str
+    email: str
+    role: str = "user"
+    subscriptions: List[str] = field(default_factory=list)
+    courses: List[str] = field(default_factory=list)
+    created_at: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class AuthResponse(Model):
+    access_token: str
+    token_type: str
+    user: Optional[User] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(access_token=data["access_token"], token_type=data.get("token_type", "bearer"),
+                   user=User.from_dict(data["user"]) if data.get("user") else None, raw=data)
+
+
+@dataclass
+class Program(Model):
+    id: str
+    name: str
+    description: str
+    price: float
+    currency: str = "EUR"
+    thumbnail_url: str = ""
+    features: List[str] = field(default_factory=list)
+    is_active: bool = True
+    created_at: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class Lesson(Model):
+    id: str
+    title: str
+    course_id: str
+    description: Optional[str] = None
+    video_url: Optional[str] = None
+    mux_playback_id: Optional[str] = None
+    duration_minutes: Optional[int] = None
+    order: int = 0
+    is_free: bool = False
+    created_at: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class Course(Model):
+    id: str
+    title: str
+    description: str
+    program_id: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    duration_hours: Optional[float] = None
+    order: int = 0
+    is_active: bool = True
+    lesson_count: int = 0
+    lessons: List[Lesson] = field(default_factory=list)
+    created_at: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_dict(cls, data):
+        course = super().from_dict({k: v for k, v in data.items() if k != "lessons"})
+        course.lessons = Lesson.from_list(data.get("lessons", []))
+        course.raw = data
+        return course
+
+
+@dataclass
+class PlaybackToken(Model):
+    lesson_id: str
+    playback_id: Optional[str] = None
+    token: Optional[str] = None
+    expires_at: Optional[str] = None
+    video_url: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class ShopProduct(Model):
+    id: str
+    title: str
+    price: float
+    description: Optional[str] = None
+    category: str = "tiktok"
+    currency: str = "EUR"
+    image_url: Optional[str] = None
+    followers: Optional[int] = None
+    specs: Optional[Dict[str, Any]] = None
+    is_available: bool = True
+    reserved_until: Optional[str] = None
+    created_at: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class FAQ(Model):
+    id: str
+    question: str
+    answer: str
+    order: int = 0
+    created_at: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class Result(Model):
+    id: str
+    image_url: str
+    caption: Optional[str] = None
+    order: int = 0
+    created_at: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class Settings(Model):
+    site_name: str = "Continental Academy"
+    logo_url: str = ""
+    favicon_url: str = ""
+    hero_headline: str = ""
+    hero_subheadline: str = ""
+    hero_video_url: str = ""
+    discord_invite_url: str = ""
+    theme: str = "dark-luxury"
+    social_links: Dict[str, str] = field(default_factory=dict)
+    contact_email: str = ""
+    contact_phone: str = ""
+    footer_text: str = ""
+    show_results_section: bool = True
+    show_faq_section: bool = True
+    currency: str = "EUR"
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class CheckoutSession(Model):
+    checkout_url: str
+    session_id: str
+    reserved_until: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class PaymentStatus(Model):
+    payment_status: str
+    customer_email: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class SearchHit(Model):
+    type: str
+    score: float
+    item: Dict[str, Any]
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class SearchResults(Model):
+    total: int
+    page: int
+    limit: int
+    results: List[SearchHit] = field(default_factory=list)
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(total=data["total"], page=data["page"], limit=data["limit"],
+                   results=SearchHit.from_list(data["results"]), raw=data)
+
+
+@dataclass
+class Upload(Model):
+    id: str
+    url: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    variants: List[Dict[str, Any]] = field(default_factory=list)
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class Analytics(Model):
+    total_users: int
+    total_subscriptions: int
+    recent_events: List[Dict[str, Any]] = field(default_factory=list)
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class Profile(Model):
+    id: str
+    type: str
+    status: str
+    filename: str
+    seconds: int = 0
+    size: Optional[int] = None
+    error: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
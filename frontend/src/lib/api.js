@@ -61,6 +61,8 @@ export const coursesAPI = {
 export const lessonsAPI = {
   getAll: (courseId) => api.get(`/lessons/${courseId}`),
   getOne: (id) => api.get(`/lesson/${id}`),
+  getPlayback: (id) => api.get(`/lesson/${id}/playback`),
+  getCoursePlayback: (courseId) => api.get(`/courses/${courseId}/playback`),
   create: (data) => api.post('/admin/lessons', data),
   update: (id, data) => api.put(`/admin/lessons/${id}`, data),
   delete: (id) => api.delete(`/admin/lessons/${id}`),
@@ -91,6 +93,11 @@ export const shopAPI = {
   deleteProduct: (id) => api.delete(`/admin/shop/products/${id}`),
 };
 
+// Search
+export const searchAPI = {
+  search: (q, params = {}) => api.get('/search', { params: { q, ...params } }),
+};
+
 // FAQs
 export const faqsAPI = {
   getAll: () => api.get('/faqs'),
@@ -106,6 +113,15 @@ export const resultsAPI = {
   delete: (id) => api.delete(`/admin/results/${id}`),
 };
 
+// Uploads
+export const uploadsAPI = {
+  upload: (file) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    return api.post('/uploads', formData, { headers: { 'Content-Type': 'multipart/form-data' } });
+  },
+};
+
 // Settings
 export const settingsAPI = {
   get: () => api.get('/settings'),
@@ -0,0 +1,12 @@
+// Data the server inlines into index.html (backend/services/prerender.js).
+// Lets the landing page render without waiting for API calls.
+const initialData = typeof window !== 'undefined' ? window.__INITIAL_DATA__ : undefined;
+
+export const getInitialData = (key) => initialData?.[key];
+
+// The inlined data is only as fresh as the page load; once a component has used its keys,
+// later mounts in the same session load from the API again
+export const consumeInitialData = (...keys) => {
+  if (!initialData) return;
+  keys.forEach(key => { delete initialData[key]; });
+};
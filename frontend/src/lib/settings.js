@@ -1,10 +1,11 @@
 import { createContext, useContext, useState, useEffect } from 'react';
 import { settingsAPI } from './api';
+import { getInitialData, consumeInitialData } from './initialData';
 
 const SettingsContext = createContext(null);
 
 export const SettingsProvider = ({ children }) => {
-  const [settings, setSettings] = useState({
+  const [settings, setSettings] = useState(() => getInitialData('settings') || {
     site_name: 'Continental Academy',
     logo_url: '',
     favicon_url: '',
@@ -23,9 +24,11 @@ export const SettingsProvider = ({ children }) => {
   });
   const [loading, setLoading] = useState(true);
 
-  const loadSettings = async () => {
+  const loadSettings = async ({ useInitial = false } = {}) => {
     try {
-      const response = await settingsAPI.get();
+      const initialSettings = useInitial ? getInitialData('settings') : null;
+      if (initialSettings) consumeInitialData('settings');
+      const response = initialSettings ? { data: initialSettings } : await settingsAPI.get();
       setSettings(response.data);
       
       // Apply theme
@@ -83,7 +86,7 @@ export const SettingsProvider = ({ children }) => {
     if (cachedTheme) {
       applyTheme(cachedTheme);
     }
-    loadSettings();
+    loadSettings({ useInitial: true });
   }, []);
 
   const updateSettings = async (newSettings) => {
@@ -39,7 +39,7 @@ import {
 } from '../components/ui/accordion';
 import { 
   programsAPI, coursesAPI, lessonsAPI, shopAPI, faqsAPI, 
-  resultsAPI, settingsAPI, analyticsAPI, adminAPI 
+  resultsAPI, settingsAPI, analyticsAPI, adminAPI, uploadsAPI 
 } from '../lib/api';
 import { toast } from 'sonner';
 
@@ -337,8 +337,8 @@ const Admin = () => {
                 <h3 className="text-xl font-black italic mb-6">Sajt i Branding</h3>
                 <div className="space-y-4">
                   <div><Label>Naziv Sajta</Label><Input value={settings.site_name || ''} onChange={e => setSettings({...settings, site_name: e.target.value})} className="bg-black mt-2" /></div>
-                  <div><Label>Logo URL</Label><Input value={settings.logo_url || ''} onChange={e => setSettings({...settings, logo_url: e.target.value})} className="bg-black mt-2" /></div>
-                  <div><Label>Hero Image URL</Label><Input value={settings.hero_image_url || ''} onChange={e => setSettings({...settings, hero_image_url: e.target.value})} className="bg-black mt-2" /></div>
+                  <div><Label>Logo URL</Label><ImageField value={settings.logo_url || ''} onChange={url => setSettings({...settings, logo_url: url})} /></div>
+                  <div><Label>Hero Image URL</Label><ImageField value={settings.hero_image_url || ''} onChange={url => setSettings({...settings, hero_image_url: url})} /></div>
                   <div><Label>Mux Video Playback ID</Label><Input value={settings.hero_video_url || ''} onChange={e => setSettings({...settings, hero_video_url: e.target.value})} className="bg-black mt-2" /></div>
                 </div>
               </Card>
@@ -404,6 +404,35 @@ const Admin = () => {
 
 // --- FORM SUB-COMPONENTS ---
 
+// URL input with an upload button; uploads go through /api/uploads (resized variants are generated server-side)
+const ImageField = ({ value, onChange }) => {
+  const [uploading, setUploading] = useState(false);
+  const handleFile = async (e) => {
+    const file = e.target.files?.[0];
+    e.target.value = '';
+    if (!file) return;
+    setUploading(true);
+    try {
+      const res = await uploadsAPI.upload(file);
+      onChange(res.data.url);
+      toast.success('Slika uploadovana');
+    } catch (error) {
+      toast.error(error.response?.data?.detail || 'Greška pri uploadu slike');
+    } finally { setUploading(false); }
+  };
+  return (
+    <div className="flex gap-2 mt-2">
+      <Input value={value} onChange={e => onChange(e.target.value)} className="bg-black" />
+      <Button variant="outline" asChild>
+        <label className="cursor-pointer">
+          {uploading ? <Loader2 className="w-4 h-4 animate-spin" /> : <Image className="w-4 h-4" />}
+          <input type="file" accept="image/*" className="hidden" onChange={handleFile} disabled={uploading} />
+        </label>
+      </Button>
+    </div>
+  );
+};
+
 const CourseForm = ({ initialData, programs, onSave, onCancel }) => {
   const [formData, setFormData] = useState({ title: initialData?.title || '', program_id: initialData?.program_id || '' });
   return (
@@ -444,7 +473,7 @@ const ProductForm = ({ initialData, onSave, onCancel }) => {
     <form onSubmit={(e) => { e.preventDefault(); onSave({...formData, price: Number(formData.price)}); }} className="space-y-6 pt-4">
       <div><Label>Naziv</Label><Input value={formData.name} onChange={e => setFormData({...formData, name: e.target.value})} className="bg-black mt-2" required /></div>
       <div><Label>Cijena (€)</Label><Input type="number" value={formData.price} onChange={e => setFormData({...formData, price: e.target.value})} className="bg-black mt-2" required /></div>
-      <div><Label>Slika URL</Label><Input value={formData.image_url} onChange={e => setFormData({...formData, image_url: e.target.value})} className="bg-black mt-2" /></div>
+      <div><Label>Slika URL</Label><ImageField value={formData.image_url} onChange={url => setFormData({...formData, image_url: url})} /></div>
       <div className="flex gap-4 pt-4"><Button type="button" variant="outline" onClick={onCancel} className="flex-1">Odustani</Button><Button type="submit" className="flex-1 bg-orange-600">Spremi</Button></div>
     </form>
   );
@@ -7,20 +7,27 @@ import {
 } from 'lucide-react';
 import { Button } from '../components/ui/button';
 import { Card, CardContent } from '../components/ui/card';
-import { coursesAPI } from '../lib/api';
+import { coursesAPI, lessonsAPI } from '../lib/api';
 import { toast } from 'sonner';
+import MuxPlayer from '@mux/mux-player-react';
 
 const CourseView = () => {
   const { courseId } = useParams();
   const [course, setCourse] = useState(null);
   const [activeLesson, setActiveLesson] = useState(null);
+  const [playback, setPlayback] = useState({}); // lessonId -> { playback_id, token, expires_at }
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     const loadCourse = async () => {
       try {
-        const response = await coursesAPI.getOne(courseId);
+        // Signed Mux tokens for the whole outline in one call; the course still opens without them
+        const [response, playbackRes] = await Promise.all([
+          coursesAPI.getOne(courseId),
+          lessonsAPI.getCoursePlayback(courseId).catch(() => null)
+        ]);
         setCourse(response.data);
+        setPlayback(playbackRes?.data || {});
         
         // Set first lesson as active
         if (response.data.lessons?.length > 0) {
@@ -41,6 +48,19 @@ const CourseView = () => {
     loadCourse();
   }, [courseId]);
 
+  // Tokens expire (PLAYBACK_TOKEN_TTL); fetch a fresh one for the opened lesson when needed.
+  // Entries without a token are unsigned (public playback id) and never expire.
+  useEffect(() => {
+    if (!activeLesson?.mux_playback_id) return;
+    const entry = playback[activeLesson.id];
+    if (entry && (!entry.token || new Date(entry.expires_at).getTime() > Date.now())) return;
+
+    const lessonId = activeLesson.id;
+    lessonsAPI.getPlayback(lessonId)
+      .then(res => setPlayback(prev => ({ ...prev, [lessonId]: res.data })))
+      .catch(error => console.error('Error loading playback token:', error));
+  }, [activeLesson, playback]);
+
   if (loading) {
     return (
       <div className="min-h-screen flex items-center justify-center pt-20">
@@ -73,14 +93,23 @@ const CourseView = () => {
     const videoUrl = lesson.video_url;
     const muxId = lesson.mux_playback_id;
     
-    // MUX video
+    // MUX video; signed playback ids get their token from /courses/:id/playback
     if (muxId) {
+      const entry = playback[lesson.id];
+      if (!entry) {
+        return (
+          <div className="w-full h-full flex items-center justify-center">
+            <Loader2 className="w-8 h-8 animate-spin text-primary" />
+          </div>
+        );
+      }
       return (
-        <iframe
-          src={`https://stream.mux.com/${muxId}.m3u8`}
+        <MuxPlayer
+          playbackId={entry.playback_id}
+          tokens={entry.token ? { playback: entry.token } : undefined}
+          metadata={{ video_title: lesson.title }}
+          streamType="on-demand"
           className="w-full h-full"
-          allowFullScreen
-          allow="autoplay; fullscreen"
         />
       );
     }
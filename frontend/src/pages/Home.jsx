@@ -7,16 +7,19 @@ import {
 import { Button } from '../components/ui/button';
 import { programsAPI, faqsAPI, resultsAPI, settingsAPI, analyticsAPI, paymentsAPI } from '../lib/api';
 import { useAuth } from '../lib/auth';
+import { getInitialData, consumeInitialData } from '../lib/initialData';
 import { toast } from 'sonner';
 import MuxPlayer from '@mux/mux-player-react';
 
 const Home = () => {
   // --- STATE ---
-  const [programs, setPrograms] = useState([]);
-  const [faqs, setFaqs] = useState([]);
-  const [results, setResults] = useState([]);
-  const [settings, setSettings] = useState({});
-  const [loading, setLoading] = useState(true);
+  // Server-prerendered data (if present) avoids the initial API round trip
+  const [prerendered] = useState(() => Boolean(getInitialData('programs') && getInitialData('settings')));
+  const [programs, setPrograms] = useState(() => getInitialData('programs') || []);
+  const [faqs, setFaqs] = useState(() => getInitialData('faqs') || []);
+  const [results, setResults] = useState(() => getInitialData('results') || []);
+  const [settings, setSettings] = useState(() => getInitialData('settings') || {});
+  const [loading, setLoading] = useState(!prerendered);
   
   const [activeFaq, setActiveFaq] = useState(null);
   const [loadingPay, setLoadingPay] = useState(null);
@@ -27,6 +30,12 @@ const Home = () => {
   // --- API LOAD ---
   useEffect(() => {
     const loadData = async () => {
+      if (prerendered) {
+        // Used once; coming back to the page later fetches fresh data
+        consumeInitialData('programs', 'faqs', 'results');
+        analyticsAPI.trackEvent({ event_type: 'page_view', page: 'home', metadata: {} });
+        return;
+      }
       try {
         setLoading(true);
         const [programsRes, faqsRes, resultsRes, settingsRes] = await Promise.all([
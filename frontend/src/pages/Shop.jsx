@@ -3,11 +3,11 @@ import { useSearchParams } from 'react-router-dom';
 import { motion } from 'framer-motion';
 import { 
   ShoppingBag, Users, TrendingUp, Eye, 
-  ChevronRight, Loader2, Check, Zap 
+  ChevronRight, Loader2, Check, Zap, Search 
 } from 'lucide-react';
 import { Button } from '../components/ui/button';
 // Koristimo raw divove za kartice radi boljeg "Brutal" dizajna, ali zadržavamo tvoje importe ako zatrebaju
-import { shopAPI, paymentsAPI, analyticsAPI } from '../lib/api';
+import { shopAPI, paymentsAPI, analyticsAPI, searchAPI } from '../lib/api';
 import { useAuth } from '../lib/auth';
 import { toast } from 'sonner';
 
@@ -17,6 +17,8 @@ const Shop = () => {
   const [products, setProducts] = useState([]);
   const [activeCategory, setActiveCategory] = useState('all');
   const [loading, setLoading] = useState(true);
+  const [query, setQuery] = useState('');
+  const [matches, setMatches] = useState(null); // id-jevi proizvoda iz /api/search, po relevantnosti
   const { user } = useAuth();
 
   // Provjera statusa plaćanja (Stripe redirect)
@@ -61,6 +63,36 @@ const Shop = () => {
     loadProducts();
   }, [activeCategory]);
 
+  // Pretraga preko /api/search (indeks na serveru, "sminka" nalazi "šminka")
+  useEffect(() => {
+    if (!query.trim()) {
+      setMatches(null);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const response = await searchAPI.search(query, {
+          type: 'product',
+          category: activeCategory === 'all' ? undefined : activeCategory,
+          limit: 50,
+        });
+        if (!cancelled) setMatches(response.data.results.map(hit => hit.item.id));
+      } catch (error) {
+        console.error('Error searching products:', error);
+        if (!cancelled) setMatches(null);
+      }
+    }, 250);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [query, activeCategory]);
+
+  const visibleProducts = matches
+    ? matches.map(id => products.find(p => p.id === id)).filter(Boolean)
+    : products;
+
   // Funkcija za kupovinu
   const handlePurchase = async (productId) => {
     if (!user) {
@@ -136,14 +168,26 @@ const Shop = () => {
           </div>
         </div>
 
+        {/* PRETRAGA */}
+        <div className="max-w-xl mx-auto mb-16 relative">
+          <Search className="absolute left-5 top-1/2 -translate-y-1/2 w-5 h-5 text-white/40" />
+          <input
+            type="search"
+            value={query}
+            onChange={(e) => setQuery(e.target.value)}
+            placeholder="Pretraži proizvode..."
+            className="w-full pl-14 pr-6 py-4 rounded-2xl bg-white/5 border border-white/10 text-white placeholder:text-white/40 focus:outline-none focus:border-orange-500/50"
+          />
+        </div>
+
         {/* PRODUCTS GRID */}
         {loading ? (
           <div className="flex justify-center py-32">
             <Loader2 className="w-12 h-12 animate-spin text-orange-600" />
           </div>
-        ) : products.length > 0 ? (
+        ) : visibleProducts.length > 0 ? (
           <div className="grid md:grid-cols-2 lg:grid-cols-3 gap-10">
-            {products.map((product, index) => (
+            {visibleProducts.map((product, index) => (
               <motion.div
                 key={product.id}
                 initial={{ opacity: 0, y: 30 }}
@@ -235,7 +279,9 @@ const Shop = () => {
               <ShoppingBag className="w-10 h-10 text-white/20" />
             </div>
             <h3 className="text-2xl font-black uppercase mb-2">Nema Proizvoda</h3>
-            <p className="text-white/40">Trenutno nema proizvoda u ovoj kategoriji.</p>
+            <p className="text-white/40">
+              {matches ? 'Nema proizvoda za ovu pretragu.' : 'Trenutno nema proizvoda u ovoj kategoriji.'}
+            </p>
           </div>
         )}
 
@@ -0,0 +1,129 @@
+"""
+Local backend runner for tests that need to control the backend's environment
+(e.g. pointing Stripe at a stand-in). Requires node, installed backend
+dependencies and TEST_MONGO_URL pointing at a disposable database.
+"""
+import json
+import os
+import shutil
+import socket
+import subprocess
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from continental_client import ContinentalClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+TEST_MONGO_URL = os.environ.get("TEST_MONGO_URL", "")
+
+# server.js creates this admin on first start
+ADMIN_EMAIL = "admin@test.com"
+ADMIN_PASSWORD = os.environ.get("TEST_ADMIN_PASSWORD", "password123")
+
+
+def require_local_backend():
+    if not shutil.which("node"):
+        pytest.skip("node is not installed")
+    if not (BACKEND_DIR / "node_modules").exists():
+        pytest.skip("backend dependencies are not installed (npm install)")
+    if not TEST_MONGO_URL:
+        pytest.skip("TEST_MONGO_URL is not set")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LocalBackend:
+    def __init__(self, env=None):
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.env = {
+            **os.environ,
+            "PORT": str(self.port),
+            "MONGO_URL": TEST_MONGO_URL,
+            "JWT_SECRET": "local-backend-test-secret",
+            **(env or {}),
+        }
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            ["node", "server.js"], cwd=BACKEND_DIR, env=self.env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                if httpx.get(f"{self.base_url}/api/settings", timeout=1).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            if self.process.poll() is not None:
+                raise RuntimeError("Backend exited during startup")
+            time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError("Backend did not start within 30s")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+    def _mongo(self, script, *args):
+        """Run a snippet against this backend's database with the backend's own mongoose;
+        `db` is the connection, extra args are in `args`. Prints go to the returned stdout."""
+        wrapper = (
+            "const mongoose = require('mongoose');"
+            "const args = process.argv.slice(1);"
+            "mongoose.connect(process.env.MONGO_URL).then(async () => {"
+            "  const db = mongoose.connection;"
+            f"  {script}"
+            "  await mongoose.disconnect();"
+            "}).catch(error => { console.error(error); process.exit(1); });"
+        )
+        result = subprocess.run(["node", "-e", wrapper, *args], cwd=BACKEND_DIR, env=self.env,
+                                capture_output=True, text=True, timeout=30, check=True)
+        return result.stdout.strip()
+
+    def insert_raw(self, collection, doc):
+        """Insert a document directly, bypassing the models (no defaults applied); returns its id"""
+        return self._mongo(
+            "const { insertedId } = await db.collection(args[0]).insertOne(JSON.parse(args[1]));"
+            "console.log(insertedId.toString());",
+            collection, json.dumps(doc)
+        )
+
+    def delete_raw(self, collection, doc_id):
+        self._mongo(
+            "await db.collection(args[0]).deleteOne({ _id: new mongoose.Types.ObjectId(args[1]) });",
+            collection, doc_id
+        )
+
+    def client(self, **kwargs):
+        """API client for this backend; retries are off so tests see raw status codes"""
+        return ContinentalClient(self.base_url, retries=0, **kwargs)
+
+    def admin_client(self, **kwargs):
+        return self.client(email=ADMIN_EMAIL, password=ADMIN_PASSWORD, **kwargs)
+
+    async def register_users(self, api, count, prefix):
+        """Register users from distinct forwarded IPs so per-IP rate limits don't apply.
+        Returns one Authorization header per user, for use with `api.request(..., headers=...)`."""
+        async def register(i):
+            response = await api.request("POST", "/auth/register", auth=False, json={
+                "name": f"{prefix} {i}",
+                "email": f"{prefix}_{i}_{time.time_ns()}@test.com",
+                "password": "testpass123"
+            }, headers={"X-Forwarded-For": f"10.{i // 250}.{i % 250}.1"})
+            response.raise_for_status()
+            return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        return await api.gather_bounded([lambda i=i: register(i) for i in range(count)], concurrency=10)
@@ -0,0 +1,124 @@
+"""
+Local Stripe stand-in
+Answers the checkout-session calls the backend makes, so payment flows can be tested
+without Stripe. Point the backend at it with STRIPE_API_HOST/PORT/PROTOCOL.
+"""
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+SESSION_PATH = re.compile(r"^/v1/checkout/sessions(?:/(?P<id>[^/]+))?(?P<expire>/expire)?$")
+
+
+class StripeStandIn:
+    def __init__(self, delay=0.0):
+        self.delay = delay          # seconds added to every response (fault injection)
+        self.fail = False           # answer every call with a 500
+        self.sessions = {}
+        self.calls = []
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def backend_env(self):
+        """Environment variables that point the backend's Stripe client here"""
+        return {
+            "STRIPE_API_KEY": "sk_test_standin",
+            "STRIPE_API_HOST": "127.0.0.1",
+            "STRIPE_API_PORT": str(self.port),
+            "STRIPE_API_PROTOCOL": "http",
+        }
+
+    def mark_paid(self, session_id):
+        with self.lock:
+            self.sessions[session_id]["payment_status"] = "paid"
+            self.sessions[session_id]["status"] = "complete"
+
+    def created_sessions(self):
+        with self.lock:
+            return list(self.sessions.values())
+
+    def _create(self, form):
+        # Like Stripe, expires_at has to be at least 30 minutes out
+        expires_at = int(form.get("expires_at", time.time() + 1800))
+        if expires_at < time.time() + 1800:
+            return 400, {"error": {"type": "invalid_request_error", "param": "expires_at",
+                                   "message": "expires_at must be at least 30 minutes in the future"}}
+        session_id = f"cs_test_{next(self._ids)}"
+        metadata = {key[len("metadata["):-1]: value for key, value in form.items() if key.startswith("metadata[")}
+        session = {
+            "id": session_id,
+            "object": "checkout.session",
+            "url": f"https://checkout.stripe.test/{session_id}",
+            "mode": form.get("mode"),
+            "status": "open",
+            "payment_status": "unpaid",
+            "expires_at": expires_at,
+            "metadata": metadata,
+            "customer_details": {"email": "buyer@test.com"},
+        }
+        with self.lock:
+            self.sessions[session_id] = session
+        return 200, session
+
+    def _handle(self, method, path, form):
+        with self.lock:
+            self.calls.append((method, path))
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            return 500, {"error": {"type": "api_error", "message": "Stand-in failure"}}
+
+        match = SESSION_PATH.match(path.split("?")[0])
+        if not match:
+            return 404, {"error": {"type": "invalid_request_error", "message": f"No route {path}"}}
+        if method == "POST" and not match["id"]:
+            return self._create(form)
+
+        with self.lock:
+            session = self.sessions.get(match["id"])
+            if session is None:
+                return 404, {"error": {"type": "invalid_request_error", "message": "No such session"}}
+            if match["expire"]:
+                session["status"] = "expired"
+            return 200, dict(session)
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                form = dict(parse_qsl(self.rfile.read(length).decode())) if length else {}
+                status, body = standin._handle(method, self.path, form)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,90 @@
+"""
+Python client tests
+Tests for: retry safety of non-idempotent requests, single re-login on concurrent 401s
+Runs against an in-process httpx transport (no server needed).
+"""
+import asyncio
+import base64
+import json
+import time
+
+import httpx
+import pytest
+
+from continental_client import ContinentalClient
+
+LOOP = asyncio.new_event_loop()
+run = LOOP.run_until_complete
+
+
+def make_token(n):
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": time.time() + 3600, "n": n}).encode()).decode()
+    return f"header.{payload.rstrip('=')}.sig"
+
+
+def make_client(handler, **kwargs):
+    client = ContinentalClient("http://test", backoff=0, **kwargs)
+    run(client._http.aclose())
+    client._http = httpx.AsyncClient(base_url="http://test/api", transport=httpx.MockTransport(handler))
+    return client
+
+
+@pytest.mark.parametrize("error, attempts", [
+    (httpx.ReadTimeout("read timed out"), 1),
+    (httpx.RemoteProtocolError("server disconnected"), 1),
+    (httpx.ConnectError("connection refused"), 3),
+    (httpx.PoolTimeout("pool exhausted"), 3),
+])
+def test_post_retries_only_unsent_requests(error, attempts):
+    """Test a POST is resent after connect failures but not after errors once it was sent"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise error
+
+    client = make_client(handler, retries=2)
+    with pytest.raises(type(error)):
+        run(client.request("POST", "/payments/checkout/product", auth=False, json={}))
+    assert len(calls) == attempts
+    run(client.aclose())
+
+
+def test_get_retries_read_errors():
+    """Test idempotent requests are still retried after a read timeout"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ReadTimeout("read timed out")
+        return httpx.Response(200, json=[])
+
+    client = make_client(handler, retries=2)
+    assert run(client.call("GET", "/programs", auth=False)) == []
+    assert len(calls) == 2
+    run(client.aclose())
+
+
+def test_concurrent_401s_log_in_once():
+    """Test many requests rejected with the same stale token share one re-login"""
+    logins = []
+    fresh = make_token("fresh")
+
+    async def handler(request):
+        if request.url.path == "/api/auth/login":
+            logins.append(request)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"access_token": fresh, "user": {}})
+        if request.headers.get("Authorization") != f"Bearer {fresh}":
+            return httpx.Response(401, json={"detail": "Invalid token"})
+        return httpx.Response(200, json={"ok": True})
+
+    client = make_client(handler, email="admin@test.com", password="admin123", token=make_token("stale"))
+
+    async def burst():
+        return await asyncio.gather(*(client.call("GET", "/auth/me") for _ in range(20)))
+
+    assert run(burst()) == [{"ok": True}] * 20
+    assert len(logins) == 1
+    run(client.aclose())
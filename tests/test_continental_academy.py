@@ -1,11 +1,18 @@
 """
 Continental Academy Backend API Tests
 Tests for: Auth, Admin, Public endpoints
+Uses continental_client; typed calls raise APIError on failure, `request()` is used where the status code is under test.
 """
-import pytest
-import requests
+import asyncio
+import json
 import os
+import struct
 import time
+import zlib
+
+import pytest
+
+from continental_client import ContinentalClient
 
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
 
@@ -15,12 +22,38 @@ ADMIN_PASSWORD = "admin123"
 STUDENT_EMAIL = "student@test.com"
 STUDENT_PASSWORD = "student123"
 
+# One event loop for the module so every test reuses the clients' keep-alive pools
+LOOP = asyncio.new_event_loop()
+asyncio.set_event_loop(LOOP)
+run = LOOP.run_until_complete
+CLIENTS = []
+
+
+def client(**kwargs):
+    """Client without retries, so tests see status codes exactly as the backend sends them"""
+    api = ContinentalClient(BASE_URL, retries=0, **kwargs)
+    CLIENTS.append(api)
+    return api
+
+
+anon = client()
+admin = client(email=ADMIN_EMAIL, password=ADMIN_PASSWORD)
+student = client(email=STUDENT_EMAIL, password=STUDENT_PASSWORD)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def close_clients():
+    yield
+    for api in CLIENTS:
+        run(api.aclose())
+
+
 class TestHealthCheck:
     """Health check endpoint tests"""
     
     def test_health_endpoint(self):
         """Test API health check"""
-        response = requests.get(f"{BASE_URL}/api/health")
+        response = run(anon.request("GET", "/health", auth=False))
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "healthy"
@@ -33,55 +66,44 @@ class TestAuthentication:
     
     def test_login_admin_success(self):
         """Test admin login with valid credentials"""
-        response = requests.post(f"{BASE_URL}/api/auth/login", json={
-            "email": ADMIN_EMAIL,
-            "password": ADMIN_PASSWORD
-        })
-        assert response.status_code == 200
-        data = response.json()
-        assert "access_token" in data
-        assert "user" in data
-        assert data["user"]["email"] == ADMIN_EMAIL
-        assert data["user"]["role"] == "admin"
-        print(f"✓ Admin login successful: {data['user']['email']}")
+        data = run(client().login(ADMIN_EMAIL, ADMIN_PASSWORD))
+        assert data.access_token
+        assert data.user.email == ADMIN_EMAIL
+        assert data.user.role == "admin"
+        print(f"✓ Admin login successful: {data.user.email}")
     
     def test_login_student_success(self):
         """Test student login with valid credentials"""
-        response = requests.post(f"{BASE_URL}/api/auth/login", json={
-            "email": STUDENT_EMAIL,
-            "password": STUDENT_PASSWORD
-        })
-        assert response.status_code == 200
-        data = response.json()
-        assert "access_token" in data
-        assert data["user"]["role"] == "user"
-        print(f"✓ Student login successful: {data['user']['email']}")
+        data = run(client().login(STUDENT_EMAIL, STUDENT_PASSWORD))
+        assert data.access_token
+        assert data.user.role == "user"
+        print(f"✓ Student login successful: {data.user.email}")
     
     def test_login_invalid_credentials(self):
         """Test login with invalid credentials"""
-        response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        response = run(anon.request("POST", "/auth/login", auth=False, json={
             "email": "wrong@test.com",
             "password": "wrongpassword"
-        })
+        }))
         assert response.status_code == 401
         print("✓ Invalid credentials rejected correctly")
     
     def test_login_missing_fields(self):
         """Test login with missing fields"""
-        response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        response = run(anon.request("POST", "/auth/login", auth=False, json={
             "email": ADMIN_EMAIL
-        })
+        }))
         assert response.status_code == 400
         print("✓ Missing fields rejected correctly")
     
     def test_register_new_user(self):
         """Test user registration"""
         test_email = f"TEST_user_{int(time.time())}@test.com"
-        response = requests.post(f"{BASE_URL}/api/auth/register", json={
+        response = run(anon.request("POST", "/auth/register", auth=False, json={
             "name": "Test User",
             "email": test_email,
             "password": "testpass123"
-        })
+        }))
         assert response.status_code == 201
         data = response.json()
         assert "access_token" in data
@@ -90,36 +112,23 @@ class TestAuthentication:
     
     def test_register_duplicate_email(self):
         """Test registration with existing email"""
-        response = requests.post(f"{BASE_URL}/api/auth/register", json={
+        response = run(anon.request("POST", "/auth/register", auth=False, json={
             "name": "Duplicate User",
             "email": ADMIN_EMAIL,
             "password": "testpass123"
-        })
+        }))
         assert response.status_code == 400
         print("✓ Duplicate email rejected correctly")
     
     def test_get_current_user(self):
         """Test getting current user with valid token"""
-        # First login
-        login_response = requests.post(f"{BASE_URL}/api/auth/login", json={
-            "email": ADMIN_EMAIL,
-            "password": ADMIN_PASSWORD
-        })
-        token = login_response.json()["access_token"]
-        
-        # Get current user
-        response = requests.get(
-            f"{BASE_URL}/api/auth/me",
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        assert response.status_code == 200
-        data = response.json()
-        assert data["email"] == ADMIN_EMAIL
-        print(f"✓ Get current user successful: {data['email']}")
+        user = run(admin.me())
+        assert user.email == ADMIN_EMAIL
+        print(f"✓ Get current user successful: {user.email}")
     
     def test_get_current_user_no_token(self):
         """Test getting current user without token"""
-        response = requests.get(f"{BASE_URL}/api/auth/me")
+        response = run(anon.request("GET", "/auth/me"))
         assert response.status_code == 401
         print("✓ Unauthorized access rejected correctly")
 
@@ -129,128 +138,135 @@ class TestPublicEndpoints:
     
     def test_get_programs(self):
         """Test getting public programs"""
-        response = requests.get(f"{BASE_URL}/api/programs")
-        assert response.status_code == 200
-        data = response.json()
+        data = run(anon.programs())
         assert isinstance(data, list)
         print(f"✓ Get programs successful: {len(data)} programs")
     
     def test_get_courses(self):
         """Test getting public courses"""
-        response = requests.get(f"{BASE_URL}/api/courses")
-        assert response.status_code == 200
-        data = response.json()
+        data = run(anon.courses())
         assert isinstance(data, list)
         print(f"✓ Get courses successful: {len(data)} courses")
     
     def test_get_faqs(self):
         """Test getting FAQs"""
-        response = requests.get(f"{BASE_URL}/api/faqs")
-        assert response.status_code == 200
-        data = response.json()
+        data = run(anon.faqs())
         assert isinstance(data, list)
         print(f"✓ Get FAQs successful: {len(data)} FAQs")
     
     def test_get_results(self):
         """Test getting results"""
-        response = requests.get(f"{BASE_URL}/api/results")
-        assert response.status_code == 200
-        data = response.json()
+        data = run(anon.results())
         assert isinstance(data, list)
         print(f"✓ Get results successful: {len(data)} results")
     
     def test_get_settings(self):
         """Test getting public settings"""
-        response = requests.get(f"{BASE_URL}/api/settings")
-        assert response.status_code == 200
-        data = response.json()
-        assert "id" in data or "type" in data
+        data = run(anon.settings())
+        assert "id" in data.raw or "type" in data.raw
         print(f"✓ Get settings successful")
     
     def test_get_shop_products(self):
         """Test getting shop products"""
-        response = requests.get(f"{BASE_URL}/api/shop/products")
-        assert response.status_code == 200
-        data = response.json()
+        data = run(anon.shop_products())
         assert isinstance(data, list)
         print(f"✓ Get shop products successful: {len(data)} products")
     
+    def test_prerendered_index_with_etag(self):
+        """Test landing page HTML has inlined data and supports ETag revalidation"""
+        response = run(anon.request("GET", f"{BASE_URL}/", auth=False))
+        assert response.status_code == 200
+        assert "window.__INITIAL_DATA__" in response.text
+        etag = response.headers.get("ETag")
+        assert etag
+        
+        cached = run(anon.request("GET", f"{BASE_URL}/", auth=False, headers={"If-None-Match": etag}))
+        assert cached.status_code == 304
+        print("✓ Prerendered index served with ETag")
+    
     def test_track_analytics_event(self):
         """Test tracking analytics event"""
-        response = requests.post(f"{BASE_URL}/api/analytics/event", json={
+        response = run(anon.request("POST", "/analytics/event", auth=False, json={
             "event_type": "page_view",
             "page": "/test",
             "user_agent": "pytest"
-        })
+        }))
         assert response.status_code == 201
         print("✓ Analytics event tracked successfully")
 
+    
+    def test_search_diacritics_and_filters(self):
+        """Test search is diacritic-insensitive and supports type/category filters"""
+        product = run(admin.admin.create_product(
+            title="TEST_Šminkerski nalog",
+            description="Profil za ljepotu i njegu",
+            price=15,
+            category="instagram"
+        ))
+        
+        try:
+            found = run(anon.search("sminkerski"))
+            assert any(hit.item["id"] == product.id for hit in found.results)
+            
+            found = run(anon.search("sminkerski", type="product", category="tiktok"))
+            assert not any(hit.item["id"] == product.id for hit in found.results)
+            
+            response = run(anon.request("GET", "/search", auth=False, params={"q": "x", "type": "unknown"}))
+            assert response.status_code == 400
+            print("✓ Search matches without diacritics and applies filters")
+        finally:
+            run(admin.admin.delete_product(product.id))
+            
+        # Deleted products drop out of the index
+        found = run(anon.search("sminkerski"))
+        assert not any(hit.item["id"] == product.id for hit in found.results)
+
 
 class TestAdminEndpoints:
     """Admin endpoint tests (requires admin auth)"""
     
-    @pytest.fixture(autouse=True)
-    def setup(self):
-        """Get admin token before each test"""
-        login_response = requests.post(f"{BASE_URL}/api/auth/login", json={
-            "email": ADMIN_EMAIL,
-            "password": ADMIN_PASSWORD
-        })
-        self.token = login_response.json()["access_token"]
-        self.headers = {"Authorization": f"Bearer {self.token}"}
-    
     def test_get_users(self):
         """Test getting all users (admin only)"""
-        response = requests.get(f"{BASE_URL}/api/admin/users", headers=self.headers)
-        assert response.status_code == 200
-        data = response.json()
+        data = run(admin.admin.users())
         assert isinstance(data, list)
         assert len(data) >= 2  # At least admin and student
         print(f"✓ Get users successful: {len(data)} users")
     
     def test_get_analytics(self):
         """Test getting analytics (admin only)"""
-        response = requests.get(f"{BASE_URL}/api/admin/analytics", headers=self.headers)
-        assert response.status_code == 200
-        data = response.json()
-        assert "total_users" in data
-        print(f"✓ Get analytics successful: {data['total_users']} total users")
+        data = run(admin.admin.analytics())
+        assert data.total_users >= 0
+        print(f"✓ Get analytics successful: {data.total_users} total users")
     
     def test_get_admin_programs(self):
         """Test getting programs (admin)"""
-        response = requests.get(f"{BASE_URL}/api/admin/programs", headers=self.headers)
-        assert response.status_code == 200
-        data = response.json()
+        data = run(admin.admin.programs())
         assert isinstance(data, list)
         print(f"✓ Get admin programs successful: {len(data)} programs")
     
     def test_get_admin_courses(self):
         """Test getting courses (admin)"""
-        response = requests.get(f"{BASE_URL}/api/admin/courses", headers=self.headers)
-        assert response.status_code == 200
-        data = response.json()
+        data = run(admin.admin.courses())
         assert isinstance(data, list)
         print(f"✓ Get admin courses successful: {len(data)} courses")
     
     def test_get_admin_shop_products(self):
         """Test getting shop products (admin)"""
-        response = requests.get(f"{BASE_URL}/api/admin/shop/products", headers=self.headers)
-        assert response.status_code == 200
-        data = response.json()
+        data = run(admin.admin.shop_products())
         assert isinstance(data, list)
         print(f"✓ Get admin shop products successful: {len(data)} products")
     
     # CRUD Tests for Programs
     def test_create_program(self):
         """Test creating a program"""
-        response = requests.post(f"{BASE_URL}/api/admin/programs", headers=self.headers, json={
+        response = run(admin.request("POST", "/admin/programs", json={
             "name": "TEST_Program",
             "description": "Test program description",
             "price": 99.99,
             "currency": "EUR",
             "features": ["Feature 1", "Feature 2"],
             "is_active": True
-        })
+        }))
         assert response.status_code == 201
         data = response.json()
         assert data["name"] == "TEST_Program"
@@ -258,84 +274,79 @@ class TestAdminEndpoints:
         print(f"✓ Create program successful: {data['id']}")
         
         # Cleanup
-        requests.delete(f"{BASE_URL}/api/admin/programs/{data['id']}", headers=self.headers)
+        run(admin.admin.delete_program(data["id"]))
     
     def test_update_program(self):
         """Test updating a program"""
         # Create first
-        create_response = requests.post(f"{BASE_URL}/api/admin/programs", headers=self.headers, json={
-            "name": "TEST_Program_Update",
-            "description": "Original description",
-            "price": 50,
-            "is_active": True
-        })
-        program_id = create_response.json()["id"]
+        program = run(admin.admin.create_program(
+            name="TEST_Program_Update",
+            description="Original description",
+            price=50,
+            is_active=True
+        ))
         
         # Update
-        response = requests.put(f"{BASE_URL}/api/admin/programs/{program_id}", headers=self.headers, json={
-            "name": "TEST_Program_Updated",
-            "description": "Updated description",
-            "price": 75
-        })
-        assert response.status_code == 200
-        data = response.json()
-        assert data["name"] == "TEST_Program_Updated"
-        assert data["price"] == 75
+        updated = run(admin.admin.update_program(
+            program.id,
+            name="TEST_Program_Updated",
+            description="Updated description",
+            price=75
+        ))
+        assert updated.name == "TEST_Program_Updated"
+        assert updated.price == 75
         print(f"✓ Update program successful")
         
         # Cleanup
-        requests.delete(f"{BASE_URL}/api/admin/programs/{program_id}", headers=self.headers)
+        run(admin.admin.delete_program(program.id))
     
     def test_delete_program(self):
         """Test deleting a program"""
         # Create first
-        create_response = requests.post(f"{BASE_URL}/api/admin/programs", headers=self.headers, json={
-            "name": "TEST_Program_Delete",
-            "description": "To be deleted",
-            "price": 10,
-            "is_active": True
-        })
-        program_id = create_response.json()["id"]
+        program = run(admin.admin.create_program(
+            name="TEST_Program_Delete",
+            description="To be deleted",
+            price=10,
+            is_active=True
+        ))
         
         # Delete
-        response = requests.delete(f"{BASE_URL}/api/admin/programs/{program_id}", headers=self.headers)
+        response = run(admin.request("DELETE", f"/admin/programs/{program.id}"))
         assert response.status_code == 200
         
         # Verify deletion
-        get_response = requests.get(f"{BASE_URL}/api/admin/programs", headers=self.headers)
-        programs = get_response.json()
-        assert not any(p["id"] == program_id for p in programs)
+        programs = run(admin.admin.programs())
+        assert not any(p.id == program.id for p in programs)
         print(f"✓ Delete program successful")
     
     # CRUD Tests for Courses
     def test_create_course(self):
         """Test creating a course"""
-        response = requests.post(f"{BASE_URL}/api/admin/courses", headers=self.headers, json={
+        response = run(admin.request("POST", "/admin/courses", json={
             "title": "TEST_Course",
             "description": "Test course description",
             "program_id": "",
             "is_active": True
-        })
+        }))
         assert response.status_code == 201
         data = response.json()
         assert data["title"] == "TEST_Course"
         print(f"✓ Create course successful: {data['id']}")
         
         # Cleanup
-        requests.delete(f"{BASE_URL}/api/admin/courses/{data['id']}", headers=self.headers)
+        run(admin.admin.delete_course(data["id"]))
     
     def test_delete_course(self):
         """Test deleting a course"""
         # Create first
-        create_response = requests.post(f"{BASE_URL}/api/admin/courses", headers=self.headers, json={
-            "title": "TEST_Course_Delete",
-            "description": "To be deleted",
-            "is_active": True
-        })
-        course_id = create_response.json()["id"]
+        course = run(admin.admin.create_course(
+            title="TEST_Course_Delete",
+            description="To be deleted",
+            is_active=True
+        ))
         
         # Delete
-        response = requests.delete(f"{BASE_URL}/api/admin/courses/{course_id}", headers=self.headers)
+        response = run(admin.request("DELETE", f"/admin/courses/{course.id}"))
         assert response.status_code == 200
         print(f"✓ Delete course successful")
     
@@ -343,160 +354,181 @@ class TestAdminEndpoints:
     def test_create_lesson(self):
         """Test creating a lesson"""
         # Create course first
-        course_response = requests.post(f"{BASE_URL}/api/admin/courses", headers=self.headers, json={
-            "title": "TEST_Course_For_Lesson",
-            "description": "Course for lesson test",
-            "is_active": True
-        })
-        course_id = course_response.json()["id"]
+        course = run(admin.admin.create_course(
+            title="TEST_Course_For_Lesson",
+            description="Course for lesson test",
+            is_active=True
+        ))
         
         # Create lesson
-        response = requests.post(f"{BASE_URL}/api/admin/lessons", headers=self.headers, json={
+        response = run(admin.request("POST", "/admin/lessons", json={
             "title": "TEST_Lesson",
             "description": "Test lesson description",
-            "course_id": course_id,
+            "course_id": course.id,
             "video_url": "https://youtube.com/watch?v=test",
             "order": 1,
             "is_free": False
-        })
+        }))
         assert response.status_code == 201
         data = response.json()
         assert data["title"] == "TEST_Lesson"
         print(f"✓ Create lesson successful: {data['id']}")
         
         # Cleanup
-        requests.delete(f"{BASE_URL}/api/admin/lessons/{data['id']}", headers=self.headers)
-        requests.delete(f"{BASE_URL}/api/admin/courses/{course_id}", headers=self.headers)
+        run(admin.admin.delete_lesson(data["id"]))
+        run(admin.admin.delete_course(course.id))
     
     # CRUD Tests for Shop Products
     def test_create_shop_product(self):
         """Test creating a shop product"""
-        response = requests.post(f"{BASE_URL}/api/admin/shop/products", headers=self.headers, json={
+        response = run(admin.request("POST", "/admin/shop/products", json={
             "title": "TEST_Product",
             "description": "Test product description",
             "price": 29.99,
             "category": "accounts",
             "is_available": True
-        })
+        }))
         assert response.status_code == 201
         data = response.json()
         assert data["title"] == "TEST_Product"
         print(f"✓ Create shop product successful: {data['id']}")
         
         # Cleanup
-        requests.delete(f"{BASE_URL}/api/admin/shop/products/{data['id']}", headers=self.headers)
+        run(admin.admin.delete_product(data["id"]))
     
     def test_delete_shop_product(self):
         """Test deleting a shop product"""
         # Create first
-        create_response = requests.post(f"{BASE_URL}/api/admin/shop/products", headers=self.headers, json={
-            "title": "TEST_Product_Delete",
-            "description": "To be deleted",
-            "price": 10,
-            "category": "accounts",
-            "is_available": True
-        })
-        product_id = create_response.json()["id"]
+        product = run(admin.admin.create_product(
+            title="TEST_Product_Delete",
+            description="To be deleted",
+            price=10,
+            category="accounts",
+            is_available=True
+        ))
         
         # Delete
-        response = requests.delete(f"{BASE_URL}/api/admin/shop/products/{product_id}", headers=self.headers)
+        response = run(admin.request("DELETE", f"/admin/shop/products/{product.id}"))
         assert response.status_code == 200
         print(f"✓ Delete shop product successful")
     
+    def test_bulk_product_operations(self):
+        """Test bounded concurrent bulk create/delete through the client helper"""
+        titles = [f"TEST_Bulk_Product_{i}" for i in range(12)]
+        created = run(admin.admin.bulk(
+            lambda title: admin.admin.create_product(title=title, price=1, category="accounts"),
+            titles, concurrency=4
+        ))
+        assert [p.title for p in created] == titles
+        
+        deleted = run(admin.admin.bulk(admin.admin.delete_product, [p.id for p in created], concurrency=4))
+        assert not any(isinstance(result, Exception) for result in deleted)
+        print(f"✓ Bulk operations successful: {len(created)} products")
+    
     # CRUD Tests for FAQs
     def test_create_faq(self):
         """Test creating a FAQ"""
-        response = requests.post(f"{BASE_URL}/api/admin/faqs", headers=self.headers, json={
+        response = run(admin.request("POST", "/admin/faqs", json={
             "question": "TEST_Question?",
             "answer": "Test answer",
             "order": 1
-        })
+        }))
         assert response.status_code == 201
         data = response.json()
         assert data["question"] == "TEST_Question?"
         print(f"✓ Create FAQ successful: {data['id']}")
         
         # Cleanup
-        requests.delete(f"{BASE_URL}/api/admin/faqs/{data['id']}", headers=self.headers)
+        run(admin.admin.delete_faq(data["id"]))
     
     def test_delete_faq(self):
         """Test deleting a FAQ"""
         # Create first
-        create_response = requests.post(f"{BASE_URL}/api/admin/faqs", headers=self.headers, json={
-            "question": "TEST_FAQ_Delete?",
-            "answer": "To be deleted",
-            "order": 1
-        })
-        faq_id = create_response.json()["id"]
+        faq = run(admin.admin.create_faq(
+            question="TEST_FAQ_Delete?",
+            answer="To be deleted",
+            order=1
+        ))
         
         # Delete
-        response = requests.delete(f"{BASE_URL}/api/admin/faqs/{faq_id}", headers=self.headers)
+        response = run(admin.request("DELETE", f"/admin/faqs/{faq.id}"))
         assert response.status_code == 200
         print(f"✓ Delete FAQ successful")
     
     # CRUD Tests for Results
     def test_create_result(self):
         """Test creating a result"""
-        response = requests.post(f"{BASE_URL}/api/admin/results", headers=self.headers, json={
+        response = run(admin.request("POST", "/admin/results", json={
             "image_url": "https://example.com/image.jpg",
             "caption": "TEST_Result",
             "order": 1
-        })
+        }))
         assert response.status_code == 201
         data = response.json()
         assert data["caption"] == "TEST_Result"
         print(f"✓ Create result successful: {data['id']}")
         
         # Cleanup
-        requests.delete(f"{BASE_URL}/api/admin/results/{data['id']}", headers=self.headers)
+        run(admin.admin.delete_result(data["id"]))
+    
+    # Upload Tests
+    def test_upload_image_variants(self):
+        """Test streaming image upload with resized variants"""
+        def chunk(kind, data):
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+        # 400x300 solid PNG generated in memory
+        rows = b"".join(b"\x00" + b"\xc8\x96\x32" * 400 for _ in range(300))
+        png = b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 400, 300, 8, 2, 0, 0, 0)) \
+            + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+        
+        upload = run(admin.admin.upload("test.png", png, "image/png"))
+        formats = {v["format"] for v in upload.variants}
+        assert formats == {"webp", "avif"}
+        assert all(v["width"] <= 400 for v in upload.variants)
+        
+        variant = run(anon.request("GET", f"{BASE_URL}{upload.variants[0]['url']}", auth=False))
+        assert variant.status_code == 200
+        assert "immutable" in variant.headers.get("Cache-Control", "")
+        print(f"✓ Upload successful: {len(upload.variants)} variants")
+    
+    def test_upload_rejects_non_image(self):
+        """Test upload rejects files that are not images"""
+        response = run(admin.request(
+            "POST", "/uploads",
+            files={"file": ("test.txt", b"not an image", "text/plain")}
+        ))
+        assert response.status_code == 400
+        print("✓ Non-image upload rejected")
     
     # Settings Tests
     def test_update_settings(self):
         """Test updating settings"""
-        response = requests.put(f"{BASE_URL}/api/admin/settings", headers=self.headers, json={
-            "site_name": "TEST_Continental Academy",
-            "hero_headline": "Test Headline"
-        })
-        assert response.status_code == 200
-        data = response.json()
-        assert data["site_name"] == "TEST_Continental Academy"
+        settings = run(admin.admin.update_settings(
+            site_name="TEST_Continental Academy",
+            hero_headline="Test Headline"
+        ))
+        assert settings.site_name == "TEST_Continental Academy"
         print(f"✓ Update settings successful")
     
     # User Management Tests
     def test_update_user_role(self):
         """Test updating user role"""
         # Get users first
-        users_response = requests.get(f"{BASE_URL}/api/admin/users", headers=self.headers)
-        users = users_response.json()
-        student = next((u for u in users if u["email"] == STUDENT_EMAIL), None)
+        users = run(admin.admin.users())
+        student_user = next((u for u in users if u.email == STUDENT_EMAIL), None)
         
-        if student:
+        if student_user:
             # Update role to admin
-            response = requests.put(
-                f"{BASE_URL}/api/admin/users/{student['id']}/role?role=admin",
-                headers=self.headers
-            )
+            response = run(admin.request("PUT", f"/admin/users/{student_user.id}/role", params={"role": "admin"}))
             assert response.status_code == 200
             
             # Revert back to user
-            requests.put(
-                f"{BASE_URL}/api/admin/users/{student['id']}/role?role=user",
-                headers=self.headers
-            )
+            run(admin.admin.set_user_role(student_user.id, "user"))
             print(f"✓ Update user role successful")
     
     def test_admin_access_denied_for_student(self):
         """Test that student cannot access admin endpoints"""
-        # Login as student
-        login_response = requests.post(f"{BASE_URL}/api/auth/login", json={
-            "email": STUDENT_EMAIL,
-            "password": STUDENT_PASSWORD
-        })
-        student_token = login_response.json()["access_token"]
-        student_headers = {"Authorization": f"Bearer {student_token}"}
-        
-        # Try to access admin endpoint
-        response = requests.get(f"{BASE_URL}/api/admin/users", headers=student_headers)
+        response = run(student.request("GET", "/admin/users"))
         assert response.status_code == 403
         print("✓ Admin access denied for student correctly")
 
@@ -507,17 +539,157 @@ class TestProtectedCourseAccess:
     def test_course_access_requires_auth(self):
         """Test that course details require authentication"""
         # First get a course ID
-        courses_response = requests.get(f"{BASE_URL}/api/courses")
-        courses = courses_response.json()
+        courses = run(anon.courses())
         
         if courses:
-            course_id = courses[0]["id"]
-            response = requests.get(f"{BASE_URL}/api/courses/{course_id}")
+            response = run(anon.request("GET", f"/courses/{courses[0].id}"))
             assert response.status_code == 401
             print("✓ Course access requires authentication")
         else:
             print("⚠ No courses to test access control")
 
+    def test_course_detail_entitlements(self):
+        """Test course detail access for admin vs student without grants"""
+        course = run(admin.admin.create_course(
+            title="TEST_Course_Access",
+            description="Course for entitlement test",
+            is_active=True
+        ))
+        run(admin.admin.create_lesson(title="TEST_Free_Lesson", course_id=course.id, order=1, is_free=True))
+        run(admin.admin.create_lesson(title="TEST_Paid_Lesson", course_id=course.id, order=2, is_free=False))
+        
+        learner = client()
+        registered = run(learner.register("Access Test", f"TEST_access_{int(time.time())}@test.com", "testpass123"))
+        
+        try:
+            # Admin sees the full course with lessons
+            assert len(run(admin.course(course.id)).lessons) == 2
+            
+            # Student without grants is denied, but still sees free lessons
+            response = run(learner.request("GET", f"/courses/{course.id}"))
+            assert response.status_code == 403
+            assert [l.title for l in run(learner.lessons(course.id))] == ["TEST_Free_Lesson"]
+            
+            # Granting the course updates access immediately
+            run(admin.admin.add_user_course(registered.user.id, course.id))
+            response = run(learner.request("GET", f"/courses/{course.id}"))
+            assert response.status_code == 200
+            print("✓ Course entitlements enforced and updated on grant")
+        finally:
+            run(admin.admin.delete_course(course.id))
+
+
+
+class TestPlaybackTokens:
+    """Signed playback token tests"""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Create a course with a Mux lesson as admin"""
+        self.course_id = run(admin.admin.create_course(
+            title="TEST_Course_Playback",
+            description="Course for playback test",
+            is_active=True
+        )).id
+        self.lesson_id = run(admin.admin.create_lesson(
+            title="TEST_Mux_Lesson",
+            course_id=self.course_id,
+            mux_playback_id="test-playback-id",
+            order=1
+        )).id
+        yield
+        run(admin.admin.delete_course(self.course_id))
+    
+    def test_lesson_token_is_cached(self):
+        """Test that repeated lesson opens reuse the same signed token"""
+        first = run(admin.lesson_playback(self.lesson_id))
+        second = run(admin.lesson_playback(self.lesson_id))
+        assert first.playback_id == "test-playback-id"
+        if first.token is None:
+            pytest.skip("backend plays unsigned (no MUX_SIGNING_KEY*, PLAYBACK_LOCAL_SIGNER unset)")
+        assert first.token == second.token
+        print("✓ Playback token reused from cache")
+    
+    def test_course_outline_batch(self):
+        """Test batch token issue for a course outline"""
+        data = run(admin.course_playback(self.course_id))
+        assert data[self.lesson_id].playback_id == "test-playback-id"
+        print(f"✓ Batch playback tokens issued: {len(data)} lessons")
+    
+    def test_playback_requires_auth(self):
+        """Test that playback tokens require authentication"""
+        response = run(anon.request("GET", f"/lesson/{self.lesson_id}/playback"))
+        assert response.status_code == 401
+        print("✓ Playback requires authentication")
+
+
+
+class TestProfiling:
+    """Admin profiling and event-loop monitoring tests"""
+
+    def test_loop_stats(self):
+        """Test event-loop delay percentiles are reported"""
+        data = run(admin.admin.loop_stats())
+        assert "p99" in data["loop_delay"]["current_window"]
+        assert isinstance(data["blocked_requests"], list)
+        print(f"✓ Loop delay p99: {data['loop_delay']['current_window']['p99']}ms")
+
+    def test_cpu_profile_capture(self, tmp_path):
+        """Test a short CPU profile can be captured and downloaded"""
+        path = run(admin.admin.capture_profile("cpu", 1, tmp_path))
+        profile = json.loads(path.read_text())
+        assert profile["nodes"]
+        assert path.suffix == ".cpuprofile"
+        print(f"✓ CPU profile downloaded: {path.stat().st_size} bytes")
+
+    def test_invalid_profile_type(self):
+        """Test unknown capture types are rejected"""
+        response = run(admin.request("POST", "/admin/profiling/profiles", json={"type": "gpu", "seconds": 1}))
+        assert response.status_code == 400
+        print("✓ Invalid profile type rejected")
+
+    def test_profiling_requires_admin(self):
+        """Test that students cannot start profiles"""
+        response = run(student.request("POST", "/admin/profiling/profiles", json={"type": "cpu", "seconds": 1}))
+        assert response.status_code == 403
+        print("✓ Profiling restricted to admins")
+
+
+class TestRateLimiting:
+    """Rate limiting tests (kept last, they drain this client's buckets)"""
+    
+    def test_login_account_limit_under_concurrency(self):
+        """Test that concurrent logins for one account are cut off with 429"""
+        email = f"TEST_ratelimit_{int(time.time())}@test.com"
+        
+        async def attempts():
+            return await anon.gather_bounded([
+                lambda: anon.request("POST", "/auth/login", auth=False, json={
+                    "email": email,
+                    "password": "wrongpassword"
+                })
+                for _ in range(30)
+            ], concurrency=15)
+        
+        responses = run(attempts())
+        
+        statuses = [r.status_code for r in responses]
+        limited = [r for r in responses if r.status_code == 429]
+        # Account bucket allows a burst of 10, every other attempt is rejected
+        assert statuses.count(401) <= 10
+        assert len(limited) >= 20
+        assert all(int(r.headers["Retry-After"]) >= 1 for r in limited)
+        print(f"✓ Account rate limit enforced: {len(limited)}/30 rejected")
+    
+    def test_other_accounts_unaffected(self):
+        """Test that a limited account does not block other accounts"""
+        response = run(anon.request("POST", "/auth/login", auth=False, json={
+            "email": ADMIN_EMAIL,
+            "password": ADMIN_PASSWORD
+        }))
+        assert response.status_code == 200
+        print("✓ Other accounts can still log in")
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,102 @@
+"""
+Deadline and circuit breaker tests
+Tests for: request budgets on Stripe calls (504), fail-fast open circuit (503), recovery
+Injects latency with a slow Stripe stand-in against a local backend (see local_backend.py).
+"""
+import asyncio
+import time
+
+import pytest
+
+from tests.local_backend import LocalBackend, require_local_backend
+from tests.stripe_standin import StripeStandIn
+
+BUDGET_ENV = {
+    "REQUEST_BUDGET_MS": "1500",
+    "STRIPE_TIMEOUT_MS": "1000",
+    "STRIPE_BREAKER_THRESHOLD": "2",
+    "STRIPE_BREAKER_RESET_MS": "1500",
+}
+SLOW = 3.0  # well past the budget
+
+LOOP = asyncio.new_event_loop()
+run = LOOP.run_until_complete
+
+
+@pytest.fixture
+def backend():
+    """Fresh backend per test, so each starts with a closed circuit"""
+    require_local_backend()
+    with StripeStandIn() as stripe:
+        with LocalBackend({**stripe.backend_env(), **BUDGET_ENV}) as backend:
+            backend.stripe = stripe
+            backend.api = backend.client()
+            backend.admin = backend.admin_client()
+            yield backend
+            stripe.delay = 0
+            run(backend.api.aclose())
+            run(backend.admin.aclose())
+
+
+@pytest.fixture
+def product(backend):
+    product_id = run(backend.admin.admin.create_product(
+        title="TEST_Deadline_Product", price=10, category="tiktok"
+    )).id
+    yield product_id
+    run(backend.admin.request("DELETE", f"/admin/shop/products/{product_id}"))
+
+
+def timed(coro):
+    start = time.monotonic()
+    response = run(coro)
+    return response, time.monotonic() - start
+
+
+def checkout(backend, product_id, headers):
+    return backend.api.request(
+        "POST", "/payments/checkout/product",
+        params={"product_id": product_id, "origin_url": "http://localhost:3000"},
+        headers=headers
+    )
+
+
+def payment_status(backend, session_id, headers):
+    return backend.api.request("GET", f"/payments/status/{session_id}", headers=headers)
+
+
+def test_slow_stripe_times_out_within_budget(backend, product):
+    """Test a hanging Stripe call returns 504 within the budget and releases the product hold"""
+    first, second = run(backend.register_users(backend.api, 2, "TEST_deadline"))
+    backend.stripe.delay = SLOW
+
+    response, elapsed = timed(checkout(backend, product, first))
+    assert response.status_code == 504
+    assert elapsed < 2.5, f"took {elapsed:.2f}s"
+
+    backend.stripe.delay = 0
+    assert run(checkout(backend, product, second)).status_code == 200
+    print(f"✓ Slow Stripe cut off after {elapsed:.2f}s, hold released")
+
+
+def test_open_circuit_fails_fast_and_recovers(backend, product):
+    """Test repeated Stripe timeouts open the circuit, then a healthy Stripe closes it again"""
+    buyer, = run(backend.register_users(backend.api, 1, "TEST_breaker"))
+    session_id = run(checkout(backend, product, buyer)).json()["session_id"]
+
+    backend.stripe.delay = SLOW
+    for _ in range(int(BUDGET_ENV["STRIPE_BREAKER_THRESHOLD"])):
+        assert run(payment_status(backend, session_id, buyer)).status_code == 504
+
+    calls_before = len(backend.stripe.calls)
+    response, elapsed = timed(payment_status(backend, session_id, buyer))
+    assert response.status_code == 503
+    assert elapsed < 0.5, f"took {elapsed:.2f}s"
+    assert len(backend.stripe.calls) == calls_before  # Stripe was not called at all
+
+    backend.stripe.delay = 0
+    time.sleep(int(BUDGET_ENV["STRIPE_BREAKER_RESET_MS"]) / 1000 + 0.2)
+    response = run(payment_status(backend, session_id, buyer))
+    assert response.status_code == 200
+    assert response.json()["payment_status"] == "unpaid"
+    print(f"✓ Open circuit answered in {elapsed * 1000:.0f}ms and recovered")
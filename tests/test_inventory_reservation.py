@@ -0,0 +1,149 @@
+"""
+Shop inventory reservation tests
+Tests for: atomic product holds under concurrent checkouts, expiry release, fulfilment
+Runs a local backend against the Stripe stand-in (see local_backend.py for requirements).
+"""
+import asyncio
+
+import pytest
+
+from tests.local_backend import LocalBackend, require_local_backend
+from tests.stripe_standin import StripeStandIn
+
+BUYERS = 100
+
+LOOP = asyncio.new_event_loop()
+run = LOOP.run_until_complete
+
+
+@pytest.fixture(scope="module")
+def backend():
+    require_local_backend()
+    with StripeStandIn() as stripe:
+        with LocalBackend(stripe.backend_env()) as backend:
+            backend.stripe = stripe
+            # Buyers share one pool sized so every checkout can be in flight at once
+            backend.api = backend.client(max_connections=BUYERS)
+            backend.admin = backend.admin_client()
+            yield backend
+            run(backend.api.aclose())
+            run(backend.admin.aclose())
+
+
+@pytest.fixture
+def product(backend):
+    product_id = run(backend.admin.admin.create_product(
+        title="TEST_One_Of_A_Kind_Account",
+        description="Only one exists",
+        price=199,
+        category="tiktok"
+    )).id
+    yield product_id
+    run(backend.admin.request("DELETE", f"/admin/shop/products/{product_id}"))
+
+
+def checkout(backend, product_id, headers):
+    return backend.api.request(
+        "POST", "/payments/checkout/product",
+        params={"product_id": product_id, "origin_url": "http://localhost:3000"},
+        headers=headers
+    )
+
+
+def test_exactly_one_winner_under_concurrent_checkouts(backend, product):
+    """Test 100 simultaneous checkouts for one product produce exactly one session"""
+    buyers = run(backend.register_users(backend.api, BUYERS, "TEST_buyer"))
+    sessions_before = len(backend.stripe.created_sessions())
+
+    async def attempt_all():
+        return await asyncio.gather(*(checkout(backend, product, headers) for headers in buyers))
+
+    responses = run(attempt_all())
+
+    statuses = [r.status_code for r in responses]
+    assert statuses.count(200) == 1, statuses
+    assert statuses.count(409) == BUYERS - 1
+    assert len(backend.stripe.created_sessions()) - sessions_before == 1
+    print(f"✓ Exactly one of {BUYERS} concurrent checkouts reserved the product")
+
+
+def test_expired_session_releases_hold(backend, product):
+    """Test the product becomes available again when the checkout session expires"""
+    first, second = run(backend.register_users(backend.api, 2, "TEST_expiry"))
+    session_id = run(checkout(backend, product, first)).json()["session_id"]
+    assert run(checkout(backend, product, second)).status_code == 409
+
+    response = run(backend.api.request("POST", "/payments/webhook", auth=False, json={
+        "type": "checkout.session.expired",
+        "data": {"object": {"id": session_id, "metadata": {"type": "product", "product_id": product}}}
+    }))
+    assert response.status_code == 200
+    assert run(checkout(backend, product, second)).status_code == 200
+    print("✓ Expired session released the hold")
+
+
+def test_paid_product_is_sold(backend, product):
+    """Test a paid checkout marks the product sold and blocks later checkouts"""
+    buyer, latecomer = run(backend.register_users(backend.api, 2, "TEST_paid"))
+    session_id = run(checkout(backend, product, buyer)).json()["session_id"]
+    backend.stripe.mark_paid(session_id)
+
+    status = run(backend.api.request("GET", f"/payments/status/{session_id}", headers=buyer))
+    assert status.json()["payment_status"] == "paid"
+
+    products = run(backend.api.shop_products())
+    sold = next(p for p in products if p.id == product)
+    assert sold.is_available is False
+    assert "reserved_by" not in sold.raw
+    assert run(checkout(backend, product, latecomer)).status_code == 409
+    print("✓ Paid product marked sold")
+
+
+def test_same_user_concurrent_checkouts(backend, product):
+    """Test a double click (same user, concurrent) creates a single Stripe session"""
+    buyer, = run(backend.register_users(backend.api, 1, "TEST_double_click"))
+    sessions_before = len(backend.stripe.created_sessions())
+
+    async def attempt_all():
+        return await asyncio.gather(*(checkout(backend, product, buyer) for _ in range(10)))
+
+    statuses = [r.status_code for r in run(attempt_all())]
+    assert statuses.count(200) == 1, statuses
+    assert statuses.count(409) == 9
+    assert len(backend.stripe.created_sessions()) - sessions_before == 1
+    print("✓ Concurrent checkouts by one user produced one session")
+
+
+def test_retry_expires_previous_session(backend, product):
+    """Test a later retry by the same user replaces (expires) the previous session"""
+    buyer, = run(backend.register_users(backend.api, 1, "TEST_retry"))
+    first = run(checkout(backend, product, buyer)).json()["session_id"]
+    second = run(checkout(backend, product, buyer))
+    assert second.status_code == 200
+    sessions = {s["id"]: s for s in backend.stripe.created_sessions()}
+    assert sessions[first]["status"] == "expired"
+    assert sessions[second.json()["session_id"]]["status"] == "open"
+    print("✓ Retry expired the previous session")
+
+
+def test_retry_aborts_when_previous_session_cannot_expire(backend, product):
+    """Test the retry fails with 503 and the hold stays on the still-open previous session"""
+    buyer, other = run(backend.register_users(backend.api, 2, "TEST_expire_fail"))
+    first = run(checkout(backend, product, buyer)).json()["session_id"]
+    sessions_before = len(backend.stripe.created_sessions())
+
+    backend.stripe.fail = True
+    try:
+        assert run(checkout(backend, product, buyer)).status_code == 503
+    finally:
+        backend.stripe.fail = False
+    assert len(backend.stripe.created_sessions()) == sessions_before
+    assert run(checkout(backend, product, other)).status_code == 409
+
+    # The hold still belongs to the first session, so its expiry releases it
+    run(backend.api.request("POST", "/payments/webhook", auth=False, json={
+        "type": "checkout.session.expired",
+        "data": {"object": {"id": first, "metadata": {"type": "product", "product_id": product}}}
+    }))
+    assert run(checkout(backend, product, other)).status_code == 200
+    print("✓ Failed expiry aborted the retry and kept the hold")
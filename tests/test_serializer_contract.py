@@ -0,0 +1,131 @@
+"""
+Serializer contract tests
+Tests for: lean list serializers produce the same bytes as the models' toJSON, including
+documents stored without their defaulted fields
+Runs a local backend with SERIALIZER_CONTRACT_TESTS=1 (see local_backend.py for requirements).
+"""
+import asyncio
+import json
+import re
+
+import pytest
+
+from tests.local_backend import LocalBackend, require_local_backend
+
+PUBLIC_ENDPOINTS = ["programs", "courses", "shop/products", "faqs", "results"]
+ADMIN_ENDPOINTS = ["admin/users", "admin/programs", "admin/courses", "admin/shop/products", "admin/analytics"]
+
+# Stored without any defaulted field: (collection, document, endpoints listing it)
+SPARSE_DOCUMENTS = [
+    ("programs", {"name": "TEST_Sparse_Program", "description": "d", "price": 1}, ["programs", "admin/programs"]),
+    ("courses", {"title": "TEST_Sparse_Course", "description": "d"}, ["courses", "admin/courses"]),
+    ("shopproducts", {"title": "TEST_Sparse_Raw_Product", "price": 1}, ["shop/products", "admin/shop/products"]),
+    ("faqs", {"question": "TEST_Sparse_FAQ", "answer": "a"}, ["faqs"]),
+    ("results", {"image_url": "/uploads/test-sparse.png"}, ["results"]),
+    ("users", {"name": "TEST_Sparse_User", "email": "test_sparse_user@test.com", "password": "x"}, ["admin/users"]),
+]
+# Date.now defaults are filled in when the document is read, so two reads never agree on the value
+DATE_DEFAULTS = {"created_at", "timestamp"}
+ISO_DATE = re.compile(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}Z$")
+
+LOOP = asyncio.new_event_loop()
+run = LOOP.run_until_complete
+
+
+@pytest.fixture(scope="module")
+def backend():
+    require_local_backend()
+    with LocalBackend({"SERIALIZER_CONTRACT_TESTS": "1"}) as backend:
+        backend.api = backend.client()
+        backend.admin = backend.admin_client()
+        yield backend
+        run(backend.api.aclose())
+        run(backend.admin.aclose())
+
+
+def fetch_both(api, endpoint):
+    fast = run(api.request("GET", f"/{endpoint}"))
+    legacy = run(api.request("GET", f"/{endpoint}", headers={"X-Serializer": "legacy"}))
+    assert fast.status_code == 200
+    assert legacy.status_code == 200
+    assert legacy.headers.get("X-Serializer") == "legacy", "legacy path was not taken"
+    assert fast.headers.get("X-Serializer") is None
+    return fast, legacy
+
+
+def assert_same_bytes(api, endpoint):
+    fast, legacy = fetch_both(api, endpoint)
+    assert fast.content == legacy.content, f"{endpoint} serializer output differs from toJSON"
+
+
+def ordered(content, sparse_ids):
+    """Response items as ordered key/value pairs; read-time date defaults of the sparse
+    documents are checked for format and masked"""
+    items = []
+    for pairs in json.loads(content, object_pairs_hook=list):
+        if dict(pairs).get("id") in sparse_ids:
+            masked = []
+            for key, value in pairs:
+                if key in DATE_DEFAULTS:
+                    assert isinstance(value, str) and ISO_DATE.match(value), f"{key}={value!r} is not an ISO date"
+                    value = "<date>"
+                masked.append((key, value))
+            pairs = masked
+        items.append(pairs)
+    return items
+
+
+def test_public_endpoints_byte_compatible(backend):
+    """Test public list endpoints match legacy toJSON output"""
+    for endpoint in PUBLIC_ENDPOINTS:
+        assert_same_bytes(backend.api, endpoint)
+    print(f"✓ {len(PUBLIC_ENDPOINTS)} public endpoints byte-compatible")
+
+
+def test_admin_endpoints_byte_compatible(backend):
+    """Test admin list endpoints match legacy toJSON output"""
+    for endpoint in ADMIN_ENDPOINTS:
+        assert_same_bytes(backend.admin, endpoint)
+    print(f"✓ {len(ADMIN_ENDPOINTS)} admin endpoints byte-compatible")
+
+
+def test_empty_objects_byte_compatible(backend):
+    """Test documents holding empty objects (minimized by toJSON)"""
+    product = run(backend.admin.admin.create_product(title="TEST_Sparse_Product", price=1, specs={}))
+    try:
+        assert_same_bytes(backend.api, "shop/products")
+        assert_same_bytes(backend.admin, "admin/shop/products")
+        print("✓ Empty objects byte-compatible")
+    finally:
+        run(backend.admin.admin.delete_product(product.id))
+
+
+def test_documents_without_defaults(backend):
+    """Test documents stored without defaulted fields get the same defaults, in the same order
+    and with the same types (dates as ISO strings) as hydrated documents"""
+    inserted = [(collection, backend.insert_raw(collection, doc), endpoints)
+                for collection, doc, endpoints in SPARSE_DOCUMENTS]
+    sparse_ids = {doc_id for _, doc_id, _ in inserted}
+    try:
+        for endpoint in sorted({e for _, _, endpoints in inserted for e in endpoints}):
+            api = backend.admin if endpoint.startswith("admin/") else backend.api
+            fast, legacy = fetch_both(api, endpoint)
+            assert ordered(fast.content, sparse_ids) == ordered(legacy.content, sparse_ids), endpoint
+        print(f"✓ {len(inserted)} documents without defaults serialize like toJSON")
+    finally:
+        for collection, doc_id, _ in inserted:
+            backend.delete_raw(collection, doc_id)
+
+
+def test_legacy_header_ignored_by_default():
+    """Test anonymous callers cannot switch to the slow path on a normally configured backend"""
+    require_local_backend()
+    with LocalBackend() as backend:
+        api = backend.client()
+        try:
+            response = run(api.request("GET", "/programs", headers={"X-Serializer": "legacy"}))
+            assert response.status_code == 200
+            assert response.headers.get("X-Serializer") is None
+        finally:
+            run(api.aclose())
+    print("✓ X-Serializer ignored without SERIALIZER_CONTRACT_TESTS")
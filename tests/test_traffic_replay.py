@@ -0,0 +1,137 @@
+"""
+Traffic replay harness tests
+Tests for: nginx/HAR parsing and request rewriting (no server needed)
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from continental_client import ContinentalClient
+from traffic_replay import TrafficReplayer, normalize_path, parse_har, parse_nginx_log
+
+NGINX_LOG = """\
+10.0.0.1 - - [19/Oct/2026:10:00:00 +0000] "GET /api/programs HTTP/1.1" 200 512 "-" "Mozilla/5.0" 0.012
+10.0.0.2 - - [19/Oct/2026:10:00:01 +0000] "POST /api/auth/login HTTP/1.1" 200 300 "-" "Mozilla/5.0" 0.180
+10.0.0.1 - - [19/Oct/2026:10:00:03 +0000] "GET /static/js/main.js HTTP/1.1" 200 9000 "-" "Mozilla/5.0"
+10.0.0.1 - - [19/Oct/2026:10:00:04 +0000] "DELETE /api/admin/faqs/65a1b2c3d4e5f6a7b8c9d0e1 HTTP/1.1" 200 20 "-" "-"
+"""
+
+
+@pytest.fixture
+def replayer():
+    replayer = TrafficReplayer("http://localhost:8001")
+    replayer.admin_token = "admin-token"
+    replayer.users = [{"email": "replay_user_0@test.com", "password": "replay123", "token": "user-token"}]
+    return replayer
+
+
+def test_parse_nginx_log(tmp_path):
+    """Test only /api lines are kept, with timing and optional request_time"""
+    log = tmp_path / "access.log"
+    log.write_text(NGINX_LOG)
+    recorded = parse_nginx_log(log)
+    assert [r["path"] for r in recorded] == ["/api/programs", "/api/auth/login",
+                                              "/api/admin/faqs/65a1b2c3d4e5f6a7b8c9d0e1"]
+    # Arrival = logged completion time - request_time
+    assert recorded[1]["timestamp"] - recorded[0]["timestamp"] == pytest.approx(1 - 0.180 + 0.012)
+    assert recorded[0]["original_ms"] == pytest.approx(12)
+    assert recorded[2]["original_ms"] is None
+
+
+def test_parse_nginx_log_orders_by_arrival(tmp_path):
+    """Test a slow request logged after a fast one is replayed first when it arrived first"""
+    log = tmp_path / "access.log"
+    log.write_text(
+        '10.0.0.1 - - [19/Oct/2026:10:00:05 +0000] "GET /api/programs HTTP/1.1" 200 512 "-" "-" 0.100\n'
+        '10.0.0.2 - - [19/Oct/2026:10:00:06 +0000] "GET /api/courses HTTP/1.1" 200 512 "-" "-" 3.000\n'
+    )
+    recorded = parse_nginx_log(log)
+    assert [r["path"] for r in recorded] == ["/api/courses", "/api/programs"]
+    assert recorded[1]["timestamp"] - recorded[0]["timestamp"] == pytest.approx(1.9)
+
+
+def test_parse_har(tmp_path):
+    """Test HAR entries keep headers and bodies"""
+    har = tmp_path / "session.har"
+    har.write_text(json.dumps({"log": {"entries": [{
+        "startedDateTime": "2026-10-19T10:00:00.000Z",
+        "time": 42.5,
+        "request": {
+            "method": "POST",
+            "url": "https://example.com/api/auth/login",
+            "headers": [{"name": "Content-Type", "value": "application/json"}],
+            "postData": {"text": "{\"email\": \"real@user.com\", \"password\": \"secret\"}"}
+        },
+        "response": {"status": 200}
+    }]}}))
+    recorded = parse_har(har)
+    assert recorded[0]["headers"] == {"content-type": "application/json"}
+    assert recorded[0]["original_ms"] == 42.5
+
+
+def test_rewrite_credentials(replayer, tmp_path):
+    """Test recorded logins and tokens are replaced by seeded users, writes skipped"""
+    log = tmp_path / "access.log"
+    log.write_text(NGINX_LOG)
+    programs, login, delete = parse_nginx_log(log)
+
+    headers, body = replayer.rewrite(login)
+    assert json.loads(body)["email"] == "replay_user_0@test.com"
+    assert headers["x-forwarded-for"] == "10.0.0.2"
+
+    headers, _ = replayer.rewrite(programs)
+    assert headers["authorization"] == "Bearer user-token"
+    assert replayer.rewrite(delete) is None
+
+
+def test_normalize_path():
+    """Test ObjectIds are grouped per endpoint"""
+    assert normalize_path("/api/courses/65a1b2c3d4e5f6a7b8c9d0e1?x=1") == "/api/courses/:id"
+
+
+def test_latency_includes_queueing(replayer):
+    """Test requests stuck behind a busy connection are measured from when they were due"""
+    async def handler(request):
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=[])
+
+    def make_client():
+        client = ContinentalClient("http://test", retries=0)
+        client._http = httpx.AsyncClient(base_url="http://test/api", transport=httpx.MockTransport(handler))
+        return client
+
+    replayer.max_connections = 1
+    replayer.client = make_client
+    recorded = [{"timestamp": 0.0, "client": "10.0.0.1", "method": "GET", "path": "/api/programs",
+                 "source": "nginx", "headers": {}, "body": None, "original_status": 200,
+                 "original_ms": None} for _ in range(3)]
+    replayer.replay(recorded)
+    latencies = sorted(r["ms"] for r in replayer.results)
+    # Each request waits for the ones before it on the single connection
+    assert [r["status"] for r in replayer.results] == [200] * 3
+    assert latencies[0] >= 45
+    assert latencies[2] >= 140
+
+
+def test_seed_registers_missing_users(replayer):
+    """Test seeding logs in existing replay users and registers the rest"""
+    registered = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        if request.url.path == "/api/auth/register":
+            registered.append(body["email"])
+        elif body["email"] == "replay_user_1@test.com" and body["email"] not in registered:
+            return httpx.Response(401, json={"detail": "Invalid credentials"})
+        return httpx.Response(200, json={"access_token": f"token-{body['email']}", "user": {}})
+
+    replayer.users = []
+    replayer.seed_users = 2
+    client = ContinentalClient("http://test", retries=0)
+    client._http = httpx.AsyncClient(base_url="http://test/api", transport=httpx.MockTransport(handler))
+    asyncio.run(replayer.seed(client))
+    assert replayer.admin_token == "token-admin@test.com"
+    assert [u["token"] for u in replayer.users] == ["token-replay_user_0@test.com", "token-replay_user_1@test.com"]
+    assert registered == ["replay_user_1@test.com"]
@@ -0,0 +1,280 @@
+"""
+Continental Academy traffic replay
+Replays recorded production traffic (nginx access log or HAR) against a local instance,
+keeping the original inter-arrival timing (optionally sped up) and reporting latency.
+
+Usage:
+    python backend_test.py --replay-nginx access.log --base-url http://localhost:8001 --speed 4
+    python backend_test.py --replay-har session.har --base-url http://localhost:8001
+"""
+import asyncio
+import json
+import re
+import time
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import httpx
+
+from continental_client import APIError, ContinentalClient
+
+# nginx "combined" format, optionally followed by $request_time (see nginx-continental-academy.conf)
+NGINX_LINE = re.compile(
+    r'(?P<addr>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+) [^"]*" '
+    r'(?P<status>\d{3}) \S+ "[^"]*" "[^"]*"(?: (?P<request_time>[\d.]+))?'
+)
+
+OBJECT_ID = re.compile(r"/[0-9a-f]{24}(?=/|$|\?)")
+READ_METHODS = {"GET", "HEAD"}
+# Never replayed: they talk to Stripe or would double-charge / double-fulfil
+SKIP_PREFIXES = ("/api/payments/",)
+# Writes whose body can be synthesized even when the log has none (nginx)
+SYNTHESIZED_BODIES = {
+    "/api/auth/login": None,  # filled with the seeded user's credentials
+    "/api/auth/register": None,
+    "/api/analytics/event": {"event_type": "page_view", "page": "replay", "metadata": {}},
+}
+
+
+def normalize_path(path):
+    """Group paths by endpoint: /api/courses/<id> -> /api/courses/:id"""
+    return OBJECT_ID.sub("/:id", path.split("?")[0])
+
+
+def parse_nginx_log(path):
+    """Parse /api requests from an nginx access log (combined format).
+    nginx logs $time_local when the request finishes, so the arrival time is
+    time_local - request_time when request_time is logged."""
+    recorded = []
+    with open(path, encoding="utf-8", errors="replace") as log:
+        for line in log:
+            match = NGINX_LINE.match(line)
+            if not match or not match["path"].startswith("/api"):
+                continue
+            finished = datetime.strptime(match["time"], "%d/%b/%Y:%H:%M:%S %z").timestamp()
+            recorded.append({
+                "timestamp": finished - float(match["request_time"] or 0),
+                "client": match["addr"],
+                "method": match["method"],
+                "path": match["path"],
+                "source": "nginx",
+                "headers": {},
+                "body": None,
+                "original_status": int(match["status"]),
+                "original_ms": float(match["request_time"]) * 1000 if match["request_time"] else None,
+            })
+    recorded.sort(key=lambda r: r["timestamp"])
+    return recorded
+
+
+def parse_har(path):
+    """Parse /api requests (with headers and bodies) from a HAR recording"""
+    with open(path, encoding="utf-8") as har_file:
+        har = json.load(har_file)
+
+    recorded = []
+    for entry in har["log"]["entries"]:
+        request = entry["request"]
+        url = urlsplit(request["url"])
+        if not url.path.startswith("/api"):
+            continue
+        headers = {h["name"].lower(): h["value"] for h in request.get("headers", [])}
+        started = entry["startedDateTime"].replace("Z", "+00:00")
+        recorded.append({
+            "timestamp": datetime.fromisoformat(started).timestamp(),
+            "client": headers.get("authorization") or entry.get("serverIPAddress", ""),
+            "method": request["method"],
+            "path": url.path + (f"?{url.query}" if url.query else ""),
+            "source": "har",
+            "headers": {k: v for k, v in headers.items() if k in ("authorization", "content-type")},
+            "body": (request.get("postData") or {}).get("text"),
+            "original_status": entry["response"]["status"],
+            "original_ms": entry.get("time"),
+        })
+    recorded.sort(key=lambda r: r["timestamp"])
+    return recorded
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class TrafficReplayer:
+    def __init__(self, base_url, admin_email="admin@test.com", admin_password="admin123",
+                 seed_users=5, speed=1.0, include_writes=False, max_connections=50):
+        self.base_url = base_url.rstrip("/")
+        self.admin_email = admin_email
+        self.admin_password = admin_password
+        self.seed_users = seed_users
+        self.speed = speed
+        self.include_writes = include_writes
+        self.max_connections = max_connections
+        self.admin_token = None
+        self.users = []          # [{"email", "password", "token"}]
+        self.client_users = {}   # original client (IP or token) -> seeded user
+        self.results = []        # [{"endpoint", "status", "ms", "original_ms", "original_status"}]
+
+    def client(self):
+        """Pooled keep-alive client; retries off so every recorded request is sent exactly once"""
+        return ContinentalClient(self.base_url, max_connections=self.max_connections, timeout=30, retries=0)
+
+    async def seed(self, client):
+        """Log in the admin and register/log in the seeded replay users"""
+        data = await client.call("POST", "/auth/login", auth=False, json={
+            "email": self.admin_email, "password": self.admin_password
+        })
+        self.admin_token = data["access_token"]
+
+        for i in range(self.seed_users):
+            user = {"email": f"replay_user_{i}@test.com", "password": "replay123"}
+            try:
+                data = await client.call("POST", "/auth/login", auth=False, json=user)
+            except APIError:
+                data = await client.call("POST", "/auth/register", auth=False,
+                                         json={"name": f"Replay User {i}", **user})
+            user["token"] = data["access_token"]
+            self.users.append(user)
+        print(f"   ✅ Seeded admin + {len(self.users)} replay users")
+
+    def user_for(self, client):
+        """Map each original client to one seeded user, round robin.
+        Several clients share an account when there are more clients than --seed-users. That is
+        fine for the login limiter (it counts failed logins per account, seeded logins succeed),
+        but per-user state such as course access is shared too."""
+        if client not in self.client_users:
+            self.client_users[client] = self.users[len(self.client_users) % len(self.users)]
+        return self.client_users[client]
+
+    def rewrite(self, recorded):
+        """Swap recorded credentials for seeded ones; returns (headers, body) or None to skip"""
+        path = recorded["path"]
+        endpoint = path.split("?")[0]
+        if path.startswith(SKIP_PREFIXES):
+            return None
+
+        synthesized = recorded["method"] == "POST" and endpoint in SYNTHESIZED_BODIES
+        if recorded["method"] not in READ_METHODS and not synthesized:
+            # Other writes only from HAR (which has the body) and only when asked for
+            if not self.include_writes or recorded["source"] != "har":
+                return None
+
+        headers = dict(recorded["headers"])
+        body = recorded["body"]
+        user = self.user_for(recorded["client"])
+
+        if recorded["source"] == "nginx":
+            # Keeps per-IP rate limits realistic (the backend trusts X-Forwarded-For from loopback)
+            headers["x-forwarded-for"] = recorded["client"]
+
+        if path.startswith("/api/admin"):
+            headers["authorization"] = f"Bearer {self.admin_token}"
+        elif "authorization" in headers or recorded["source"] == "nginx":
+            # nginx logs carry no headers, so every non-admin request is sent as a seeded user
+            headers["authorization"] = f"Bearer {user['token']}"
+
+        if endpoint == "/api/auth/login":
+            body = json.dumps({"email": user["email"], "password": user["password"]})
+        elif endpoint == "/api/auth/register":
+            body = json.dumps({"name": "Replay", "email": f"replay_{time.time_ns()}@test.com",
+                               "password": "replay123"})
+        elif synthesized and body is None:
+            body = json.dumps(SYNTHESIZED_BODIES[endpoint])
+        if body is not None:
+            headers.setdefault("content-type", "application/json")
+        return headers, body
+
+    async def send(self, client, slots, recorded, headers, body, due_at):
+        """Latency counts from when the request was due, not when a connection slot freed up,
+        so time spent queued behind a saturated pool or a slow scheduler is included"""
+        try:
+            async with slots:
+                response = await client.request(
+                    recorded["method"], recorded["path"][len("/api"):], auth=False,
+                    headers=headers, content=body
+                )
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        elapsed = (time.perf_counter() - due_at) * 1000
+        self.results.append({
+            "endpoint": f"{recorded['method']} {normalize_path(recorded['path'])}",
+            "status": status,
+            "ms": elapsed,
+            "original_ms": recorded["original_ms"],
+            "original_status": recorded["original_status"],
+        })
+
+    def replay(self, recorded):
+        """Replay requests on their original schedule, divided by the speed multiplier"""
+        if not recorded:
+            print("⚠ Nothing to replay")
+            return
+        asyncio.run(self._replay(recorded))
+
+    async def _replay(self, recorded):
+        async with self.client() as client:
+            if not self.users:
+                await self.seed(client)
+
+            skipped = 0
+            sending = []
+            slots = asyncio.Semaphore(self.max_connections)
+            origin = recorded[0]["timestamp"]
+            started = time.perf_counter()
+            print(f"\n▶ Replaying {len(recorded)} requests at {self.speed}x")
+
+            for item in recorded:
+                rewritten = self.rewrite(item)
+                if rewritten is None:
+                    skipped += 1
+                    continue
+                if self.speed > 0:
+                    due_at = started + (item["timestamp"] - origin) / self.speed
+                    delay = due_at - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                else:
+                    due_at = time.perf_counter()
+                sending.append(asyncio.ensure_future(self.send(client, slots, item, *rewritten, due_at)))
+            await asyncio.gather(*sending)
+
+        print(f"   Sent {len(self.results)}, skipped {skipped} (writes/payments)")
+
+    def report(self):
+        """Print the replay latency distribution next to the recorded production latency"""
+        if not self.results:
+            return {}
+        latencies = [r["ms"] for r in self.results]
+        original = [r["original_ms"] for r in self.results if r["original_ms"] is not None]
+        errors = [r for r in self.results if r["status"] == 0 or r["status"] >= 500]
+        mismatched = [r for r in self.results if r["status"] != r["original_status"]]
+
+        print("\n" + "=" * 60)
+        print("📊 REPLAY LATENCY (ms)")
+        print("=" * 60)
+        print(f"{'':10}{'p50':>10}{'p90':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+        summary = {}
+        for label, values in (("replay", latencies), ("production", original)):
+            if not values:
+                continue
+            row = {p: percentile(values, p) for p in (50, 90, 95, 99, 100)}
+            summary[label] = row
+            print(f"{label:10}" + "".join(f"{row[p]:>10.1f}" for p in (50, 90, 95, 99, 100)))
+
+        print(f"\nRequests: {len(self.results)}  errors: {len(errors)}  status mismatches: {len(mismatched)}")
+
+        by_endpoint = defaultdict(list)
+        for r in self.results:
+            by_endpoint[r["endpoint"]].append(r["ms"])
+        print(f"\n{'endpoint':45}{'count':>8}{'p50':>10}{'p95':>10}")
+        for endpoint, values in sorted(by_endpoint.items(), key=lambda kv: -percentile(kv[1], 95)):
+            print(f"{endpoint[:45]:45}{len(values):>8}{percentile(values, 50):>10.1f}{percentile(values, 95):>10.1f}")
+
+        summary["errors"] = len(errors)
+        summary["status_mismatches"] = len(mismatched)
+        return summary